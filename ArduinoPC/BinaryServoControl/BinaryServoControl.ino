@@ -0,0 +1,132 @@
+#include <Servo.h>
+// Binary framed servo protocol, see ArduinoPC/servoprotocol.py.
+// Frame: SYNC | LEN | TYPE | SEQ | PAYLOAD (LEN bytes) | CRC8 (over LEN..PAYLOAD)
+// MOVE payload: n x (axis, angle, duration_ms low, duration_ms high)
+// ACK payload: status, angle servo 1, angle servo 2
+
+const byte SYNC = 0xA5;
+const byte MOVE = 0x01;
+const byte PING = 0x02;
+const byte ACK = 0x81;
+const byte STATUS_OK = 0;
+const byte STATUS_BAD_AXIS = 1;
+const byte MAX_PAYLOAD = 32;
+
+Servo servos[2];
+const int pins[2] = {5, 6};
+
+// Motion of each servo, interpolated in loop().
+int startAngle[2] = {90, 90};
+int targetAngle[2] = {90, 90};
+unsigned long startTime[2] = {0, 0};
+unsigned int duration[2] = {0, 0};
+int angle[2] = {90, 90};
+
+// Receive state.
+byte frame[MAX_PAYLOAD + 4];
+byte received = 0;
+bool inFrame = false;
+
+byte crc8(const byte *data, byte len) {
+  byte crc = 0;
+  for (byte i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (byte b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+void sendAck(byte seq, byte status) {
+  byte out[8];
+  out[0] = SYNC;
+  out[1] = 3;
+  out[2] = ACK;
+  out[3] = seq;
+  out[4] = status;
+  out[5] = angle[0];
+  out[6] = angle[1];
+  out[7] = crc8(out + 1, 6);
+  Serial.write(out, 8);
+}
+
+void handleFrame() {
+  // frame[] holds LEN, TYPE, SEQ, PAYLOAD, CRC
+  byte len = frame[0];
+  byte type = frame[1];
+  byte seq = frame[2];
+  byte status = STATUS_OK;
+  if (type == MOVE) {
+    unsigned long now = millis();
+    for (byte i = 0; i + 4 <= len; i += 4) {
+      byte axis = frame[3 + i];
+      if (axis < 1 || axis > 2) {
+        status = STATUS_BAD_AXIS;
+        continue;
+      }
+      byte k = axis - 1;
+      startAngle[k] = angle[k];
+      targetAngle[k] = frame[4 + i];
+      duration[k] = frame[5 + i] | (frame[6 + i] << 8);
+      startTime[k] = now;
+    }
+  } else if (type != PING) {
+    return;
+  }
+  sendAck(seq, status);
+}
+
+void receive() {
+  while (Serial.available()) {
+    byte c = Serial.read();
+    if (!inFrame) {
+      if (c == SYNC) {
+        inFrame = true;
+        received = 0;
+      }
+      continue;
+    }
+    frame[received++] = c;
+    if (frame[0] > MAX_PAYLOAD) {
+      inFrame = false; // Corrupt length, resynchronize.
+      continue;
+    }
+    if (received == frame[0] + 4) {
+      inFrame = false;
+      if (crc8(frame, received - 1) == frame[received - 1]) {
+        handleFrame();
+      }
+    }
+  }
+}
+
+void updateServos() {
+  unsigned long now = millis();
+  for (byte k = 0; k < 2; k++) {
+    int a = targetAngle[k];
+    unsigned long t = now - startTime[k];
+    if (t < duration[k]) {
+      // Smoothstep interpolation from the start to the target angle.
+      float x = (float)t / duration[k];
+      a = startAngle[k] + (targetAngle[k] - startAngle[k]) * x * x * (3 - 2 * x) + 0.5;
+    }
+    if (a != angle[k]) {
+      angle[k] = a;
+      servos[k].write(a);
+    }
+  }
+}
+
+void setup() {
+  for (byte k = 0; k < 2; k++) {
+    servos[k].attach(pins[k]);
+    servos[k].write(angle[k]);
+  }
+  Serial.begin(115200);
+}
+
+void loop() {
+  receive();
+  updateServos();
+}
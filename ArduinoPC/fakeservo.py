@@ -0,0 +1,70 @@
+"""
+Fake BinaryServoControl device on a pseudo terminal (POSIX only), for testing
+the servo protocol and driver without an Arduino. Open `device.port` with
+ServoLink, or any serial terminal.
+"""
+import os
+import tty
+import time
+import select
+import threading
+
+from servoprotocol import FrameParser, MOVE, PING, STATUS_OK, STATUS_BAD_AXIS, decode_move, encode_ack
+
+class FakeServoDevice:
+	"""
+	Emulates the firmware: parses frames from the pty, acknowledges MOVE and
+	PING frames after `latency` seconds and interpolates the servo angles
+	towards the targets over the requested durations.
+	"""
+	def __init__(self, latency: float=0.0, start_angles: tuple=(90, 90)):
+		self.master, self.slave = os.openpty()
+		tty.setraw(self.slave)
+		self.port = os.ttyname(self.slave)
+		self.latency = latency
+		self.parser = FrameParser()
+		# Per servo: (start angle, target angle, start time, duration).
+		self.motions = {axis: (angle, angle, 0.0, 0.0) for axis, angle in zip((1, 2), start_angles)}
+		self.frames = [] # Received frames, as (type, seq, payload).
+		self.running = True
+		self.thread = threading.Thread(target=self.__run, daemon=True)
+		self.thread.start()
+
+	def get_angle(self, axis: int) -> int:
+		"""Current angle of a servo, interpolated as by the firmware."""
+		start, target, t0, duration = self.motions[axis]
+		if duration <= 0:
+			return target
+		x = min((time.perf_counter() - t0)/duration, 1.0)
+		return round(start + (target - start)*x*x*(3 - 2*x))
+
+	def __run(self) -> None:
+		while self.running:
+			ready, _, _ = select.select([self.master], [], [], 0.05)
+			if not ready:
+				continue
+			try:
+				data = os.read(self.master, 256)
+			except OSError:
+				return
+			for frame_type, seq, payload in self.parser.feed(data):
+				self.frames.append((frame_type, seq, payload))
+				status = STATUS_OK
+				if frame_type == MOVE:
+					now = time.perf_counter()
+					for axis, (angle, duration) in decode_move(payload).items():
+						if axis not in self.motions:
+							status = STATUS_BAD_AXIS
+							continue
+						self.motions[axis] = (self.get_angle(axis), angle, now, duration)
+				elif frame_type != PING:
+					continue
+				if self.latency > 0:
+					time.sleep(self.latency)
+				os.write(self.master, encode_ack(seq, status, (self.get_angle(1), self.get_angle(2))))
+
+	def close(self) -> None:
+		self.running = False
+		self.thread.join(timeout=1.0)
+		os.close(self.master)
+		os.close(self.slave)
@@ -0,0 +1,208 @@
+"""
+Compact binary serial protocol for the BinaryServoControl firmware, and a
+Python driver for it.
+
+Frame layout (all multi-byte fields little endian):
+
+	SYNC (0xA5) | LEN | TYPE | SEQ | PAYLOAD (LEN bytes) | CRC8
+
+The CRC-8 (polynomial 0x07) covers LEN, TYPE, SEQ and the payload. Frames
+with a bad CRC are dropped by the receiver.
+
+	MOVE (0x01): n x (axis u8, angle u8, duration_ms u16), one entry per axis.
+	PING (0x02): empty, used to detect the device after opening the port.
+	ACK  (0x81): status u8, angle of servo 1 u8, angle of servo 2 u8.
+	             Echoes the sequence number of the acknowledged frame.
+"""
+import time
+import struct
+import threading
+
+SYNC = 0xA5
+MOVE = 0x01
+PING = 0x02
+ACK = 0x81
+STATUS_OK = 0
+STATUS_BAD_AXIS = 1
+MAX_PAYLOAD = 32
+
+def crc8(data: bytes) -> int:
+	"""CRC-8 with polynomial 0x07, as implemented by the firmware."""
+	crc = 0
+	for byte in data:
+		crc ^= byte
+		for _ in range(8):
+			crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+	return crc
+
+def encode_frame(frame_type: int, seq: int, payload: bytes=b"") -> bytes:
+	"""Encode a single frame."""
+	body = bytes([len(payload), frame_type, seq & 0xFF]) + payload
+	return bytes([SYNC]) + body + bytes([crc8(body)])
+
+def encode_move(seq: int, targets: dict) -> bytes:
+	"""MOVE frame for the targets {axis: (angle, duration in seconds)} of one or more axes."""
+	payload = b"".join(struct.pack("<BBH", axis, int(round(angle)), int(round(1e3*duration)))
+	                   for axis, (angle, duration) in sorted(targets.items()))
+	return encode_frame(MOVE, seq, payload)
+
+def decode_move(payload: bytes) -> dict:
+	"""Targets {axis: (angle, duration in seconds)} of a MOVE payload."""
+	return {axis: (angle, duration/1e3) for axis, angle, duration in struct.iter_unpack("<BBH", payload)}
+
+def encode_ack(seq: int, status: int, angles: tuple) -> bytes:
+	return encode_frame(ACK, seq, bytes([status, int(angles[0]), int(angles[1])]))
+
+class FrameParser:
+	"""Incremental frame parser, resynchronizing on the next SYNC byte after an error."""
+	def __init__(self):
+		self.buffer = bytearray()
+		self.errors = 0 # No. of dropped (corrupt) frames.
+
+	def feed(self, data: bytes) -> list:
+		"""Consume received bytes, returns the complete frames as (type, seq, payload)."""
+		self.buffer += data
+		frames = []
+		while True:
+			start = self.buffer.find(SYNC)
+			if start < 0:
+				self.buffer.clear()
+				break
+			del self.buffer[:start]
+			if len(self.buffer) < 2:
+				break
+			length = self.buffer[1]
+			if length > MAX_PAYLOAD:
+				self.errors += 1
+				del self.buffer[0]
+				continue
+			size = length + 5
+			if len(self.buffer) < size:
+				break
+			body = bytes(self.buffer[1:size-1])
+			if crc8(body) != self.buffer[size-1]:
+				self.errors += 1
+				del self.buffer[0]
+				continue
+			frames.append((body[1], body[2], body[3:]))
+			del self.buffer[:size]
+		return frames
+
+class ServoLink:
+	"""
+	Driver for the BinaryServoControl firmware. A move of both axes is sent as
+	a single MOVE frame and never blocks: acknowledgements are read by a
+	background thread, which tracks the round-trip time and the latest servo
+	angles reported by the device.
+	"""
+	def __init__(self, port: str, baudrate: int=115200, ack_timeout: float=0.5, connect_timeout: float=3.0):
+		import serial # Deferred import, pyserial is only needed by the driver.
+		self.serial = serial.Serial(port, baudrate, timeout=0.05)
+		self.ack_timeout = ack_timeout
+		self.parser = FrameParser()
+		self.lock = threading.Lock()
+		self.seq = 0
+		self.pending = {} # Seq. no. -> send time, of unacknowledged frames.
+		self.outcome = {} # Seq. no. -> True if acknowledged, False if lost.
+		self.acked = threading.Condition(self.lock)
+		self.angles = (None, None) # Latest reported servo angles.
+		# Statistics.
+		self.sent = 0
+		self.acks = 0
+		self.lost = 0
+		self.rejected = 0
+		self.rtt_sum = 0.0
+		self.max_rtt = 0.0
+		self.running = True
+		self.reader = threading.Thread(target=self.__read_loop, daemon=True)
+		self.reader.start()
+		self.__connect(connect_timeout)
+
+	def __connect(self, timeout: float) -> None:
+		"""Ping until the device answers, e.g. after the auto-reset on opening the port."""
+		deadline = time.perf_counter() + timeout
+		while time.perf_counter() < deadline:
+			if self.wait(self.__send(PING), timeout=0.25):
+				return
+		self.close()
+		raise TimeoutError(f"ServoLink: No answer from {self.serial.port}")
+
+	def __register(self) -> int:
+		"""Next sequence no., registered as waiting for its acknowledgement."""
+		with self.lock:
+			self.seq = (self.seq + 1) & 0xFF
+			self.pending[self.seq] = time.perf_counter()
+			self.outcome.pop(self.seq, None)
+			self.sent += 1
+			return self.seq
+
+	def __send(self, frame_type: int, payload: bytes=b"") -> int:
+		seq = self.__register()
+		self.serial.write(encode_frame(frame_type, seq, payload))
+		return seq
+
+	def move(self, targets: dict) -> int:
+		"""
+		Move one or more axes, given as {axis: (angle, duration in seconds)}, in a
+		single frame. Returns the sequence no. of the frame, without waiting.
+		"""
+		seq = self.__register()
+		self.serial.write(encode_move(seq, targets))
+		return seq
+
+	def wait(self, seq: int, timeout: float=None) -> bool:
+		"""Wait for the acknowledgement of a frame. Returns False on timeout."""
+		timeout = self.ack_timeout if timeout is None else timeout
+		with self.acked:
+			if not self.acked.wait_for(lambda: seq not in self.pending, timeout):
+				return False
+			return self.outcome.get(seq, False)
+
+	def __read_loop(self) -> None:
+		while self.running:
+			try:
+				data = self.serial.read(max(1, self.serial.in_waiting))
+			except Exception:
+				if self.running:
+					raise
+				return
+			now = time.perf_counter()
+			with self.acked:
+				for frame_type, seq, payload in self.parser.feed(data):
+					if frame_type != ACK or seq not in self.pending:
+						continue
+					rtt = now - self.pending.pop(seq)
+					self.outcome[seq] = True
+					self.acks += 1
+					self.rtt_sum += rtt
+					self.max_rtt = max(self.max_rtt, rtt)
+					status, angle1, angle2 = payload[:3]
+					if status != STATUS_OK:
+						self.rejected += 1
+					self.angles = (angle1, angle2)
+				# Frames without an acknowledgement within the timeout are counted as lost.
+				for seq, t in list(self.pending.items()):
+					if now - t > self.ack_timeout:
+						del self.pending[seq]
+						self.outcome[seq] = False
+						self.lost += 1
+				self.acked.notify_all()
+
+	def get_stats(self):
+		"""Frame counters and acknowledgement round-trip time (in ms)."""
+		with self.lock:
+			return {
+				'sent': self.sent,
+				'acked': self.acks,
+				'lost': self.lost,
+				'rejected': self.rejected,
+				'outstanding': len(self.pending),
+				'corrupt': self.parser.errors,
+				'mean_rtt_ms': 1e3*self.rtt_sum/max(self.acks, 1),
+				'max_rtt_ms': 1e3*self.max_rtt,
+			}
+
+	def close(self) -> None:
+		self.running = False
+		self.reader.join(timeout=1.0)
+		self.serial.close()
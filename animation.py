@@ -0,0 +1,84 @@
+import math
+
+class SpriteSheet:
+	"""Precomputed UV coordinates of all frames of a spritesheet, one animation per row."""
+	def __init__(self, rows: int, cols: int):
+		self.rows = rows
+		self.cols = cols
+		self.uv = [[((col/cols, row/rows), ((col+1)/cols, (row+1)/rows)) for col in range(cols)]
+		           for row in range(rows)]
+
+	def get_uv(self, row: int, col: int):
+		"""(uv_min, uv_max) of the given frame."""
+		return self.uv[row][col]
+
+# States of the status icons.
+STOPPING = "stopping"
+STARTING = "starting"
+CHECKMARK = "checkmark"
+COGWHEEL = "cogwheel"
+
+class StatusIcon:
+	"""
+	State machine of an animated status icon, drawn from a 3 by 28 spritesheet.
+	Row 0 holds the play/pause transition, row 1 the checkmark and row 2 the
+	cogwheel animation. Events may be triggered from any thread, the render
+	loop calls `update` which only reports frame and status text changes.
+	"""
+	stop_duration = 0.3 # Seconds
+	start_duration = 0.3
+	checkmark_duration = 1.25
+	cogwheel_duration = 2
+
+	def __init__(self, spritesheet: SpriteSheet, frame: tuple=(0, 14)):
+		self.spritesheet = spritesheet
+		self.num_frames = spritesheet.cols
+		self.frame = frame # Frame currently shown, (row, col).
+		# Latest event (state, start time, status label), replaced atomically.
+		self.event = (STOPPING, -math.inf, None)
+		self.state = None # Current (state, start time).
+
+	def trigger_stop(self, t: float):
+		self.event = (STOPPING, t, None)
+
+	def trigger_start(self, t: float):
+		self.event = (STARTING, t, None)
+
+	def trigger_action(self, t: float, label: str):
+		self.event = (CHECKMARK, t, label)
+
+	def __get_frame(self, state: str, dt: float):
+		"""Spritesheet frame of the given state, at time dt since entering it."""
+		n = self.num_frames
+		if state == STOPPING:
+			return 0, int(0.5*min(dt/self.stop_duration, 1)*n)
+		if state == STARTING:
+			return 0, int(0.5*(1 - min(dt/self.start_duration, 1))*n)
+		if state == CHECKMARK:
+			return 1, min(int(dt/self.checkmark_duration*n), n-1)
+		if state == COGWHEEL:
+			return 2, int(dt/self.cogwheel_duration*2*n) % n
+		return 0, 0 # Static "play" icon.
+
+	def update(self, now: float):
+		"""
+		Advance the animation. Returns (uv, label), where uv is (uv_min, uv_max) if
+		the shown frame changed and None otherwise, and label is the key of the new
+		status text on a state transition, None otherwise.
+		"""
+		state, t0, label = self.event
+		dt = now - t0
+		# Automatic transitions of the action sequence: checkmark, cogwheel, play.
+		if state == CHECKMARK and dt >= self.checkmark_duration:
+			state, dt = COGWHEEL, dt - self.checkmark_duration
+			if dt >= self.cogwheel_duration:
+				state = None
+		new_label = None
+		if (state, t0) != self.state:
+			new_label = {CHECKMARK: 'status_detected', COGWHEEL: label, None: 'status_wait'}.get(state)
+			self.state = (state, t0)
+		frame = self.__get_frame(state, dt)
+		if frame == self.frame:
+			return None, new_label
+		self.frame = frame
+		return self.spritesheet.get_uv(*frame), new_label
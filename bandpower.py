@@ -0,0 +1,140 @@
+import numpy as np
+
+# Frequency bands (Hz) used by BrainFlow's get_avg_band_powers: delta, theta, alpha, beta, gamma.
+# These differ from its documentation (1-4, 4-8, 8-13, 13-30, 30-50 Hz), alpha overlaps theta.
+BANDS = [(1.5, 4.0), (4.0, 8.0), (7.5, 13.0), (13.0, 30.0), (30.0, 45.0)]
+
+def nearest_power_of_two(value: int) -> int:
+	"""Nearest power of two, rounding ties up, as BrainFlow's get_nearest_power_of_two."""
+	lower = 1 << (int(value).bit_length() - 1)
+	upper = lower << 1
+	return lower if value - lower < upper - value else upper
+
+def segment_length(sampling_rate: int, window_points: int) -> int:
+	"""Welch segment length of get_avg_band_powers: twice the nearest power of two of the sampling rate, halved until it fits the window."""
+	nfft = 2 * nearest_power_of_two(sampling_rate)
+	while nfft > window_points:
+		nfft //= 2
+	return nfft
+
+class WelchBandPower:
+	"""
+	Sliding-window estimator of relative band powers using Welch's method,
+	with the segment length, 80% overlap, periodic Hann window and band 
+	integration of BrainFlow's get_avg_band_powers.
+
+	Periodograms of the segments are cached in a fixed array. Every update
+	only computes the FFTs of the segments completed since the last update,
+	and the averaged PSD is maintained as a running sum over the segments 
+	within the window. Segments are aligned to absolute sample positions
+	rather than to the window start, and get_avg_band_powers' own filtering
+	of each window (apply_filter) is not repeated, the window holds filtered
+	data already. See testscripts/bandpower_parity.py for the difference.
+	"""
+	def __init__(self, sampling_rate: int, window_points: int, bands: list=BANDS):
+		self.sampling_rate = sampling_rate
+		self.nfft = segment_length(sampling_rate, window_points)
+		self.hop = self.nfft - int(0.8 * self.nfft)
+		self.window = 0.5 - 0.5*np.cos(2*np.pi*np.arange(self.nfft)/self.nfft)
+		self.scale = 1.0 / (sampling_rate * np.sum(self.window**2))
+		self.freqs = np.fft.rfftfreq(self.nfft, 1.0/sampling_rate)
+		# Trapezoidal integration weights of each band, from the first frequency at or 
+		# above the lower edge to the first one above the upper edge. Integration 
+		# becomes a matrix product.
+		df = self.freqs[1] - self.freqs[0]
+		self.band_weights = np.zeros((len(bands), self.freqs.size))
+		for i, (start, stop) in enumerate(bands):
+			first = np.searchsorted(self.freqs, start, side='left')
+			last = np.searchsorted(self.freqs, stop, side='right')
+			self.band_weights[i, first:last+1] = df
+			self.band_weights[i, [first, last]] = df/2
+		# Periodogram cache covering all segments within the window.
+		self.max_segments = max(1, (window_points - self.nfft) // self.hop + 1)
+		self.periodograms = np.zeros((self.max_segments, self.freqs.size))
+		self.psd_sum = np.zeros(self.freqs.size)
+		self.count = 0
+		self.slot = 0
+		self.next_end = None # Absolute sample index where the next segment ends.
+		self.band_power = np.zeros(len(bands))
+
+	def __periodogram(self, segment: np.ndarray) -> np.ndarray:
+		"""One-sided power spectral density of a single segment."""
+		spectrum = np.fft.rfft(segment * self.window)
+		psd = (spectrum.real**2 + spectrum.imag**2) * self.scale
+		psd[1:-1] *= 2
+		return psd
+
+	def __relative(self, psd: np.ndarray, out: np.ndarray) -> np.ndarray:
+		"""Integrate the PSD over each band, normalize to relative band powers."""
+		np.dot(self.band_weights, psd, out=out)
+		total = out.sum()
+		if total > 0:
+			out /= total
+		return out
+
+	def estimate(self, x: np.ndarray) -> np.ndarray:
+		"""
+		Relative band powers of a whole window, with the segments aligned to
+		the window start. Matches get_avg_band_powers without filtering, used
+		as the reference for the incremental estimate.
+		"""
+		starts = range(0, x.size - self.nfft + 1, self.hop)
+		psd = np.mean([self.__periodogram(x[start:start+self.nfft]) for start in starts], axis=0)
+		return self.__relative(psd, np.zeros_like(self.band_power))
+
+	def update(self, x: np.ndarray, num_samples: int) -> np.ndarray:
+		"""
+		Update the estimate from the latest window `x` of a single channel,
+		where `num_samples` is the total no. of samples seen up to and
+		including the last sample of `x`. Returns the relative band powers.
+		"""
+		window_start = num_samples - x.size
+		first_end = window_start + self.nfft # End of the oldest segment fully within the window.
+		if self.next_end is None:
+			self.next_end = first_end
+		elif self.next_end < first_end:
+			# Skip segments which are no longer within the window.
+			self.next_end += -(-(first_end - self.next_end) // self.hop) * self.hop
+		# Only compute periodograms of the newly completed segments.
+		while self.next_end <= num_samples:
+			stop = self.next_end - window_start
+			psd = self.__periodogram(x[stop-self.nfft:stop])
+			if self.count == self.max_segments:
+				self.psd_sum -= self.periodograms[self.slot]
+			else:
+				self.count += 1
+			self.periodograms[self.slot] = psd
+			self.psd_sum += psd
+			self.slot = (self.slot + 1) % self.max_segments
+			if self.slot == 0:
+				# Resynchronize the running sum, avoids accumulation of round-off errors.
+				self.psd_sum = self.periodograms[:self.count].sum(0)
+			self.next_end += self.hop
+		if self.count == 0:
+			return self.band_power
+		return self.__relative(self.psd_sum / self.count, self.band_power)
+
+class RunningMean:
+	"""Moving average over the latest `length` vectors, kept as a running sum in a fixed array."""
+	def __init__(self, length: int, width: int):
+		self.history = np.zeros((length, width))
+		self.sum = np.zeros(width)
+		self.mean = np.zeros(width)
+		self.length = length
+		self.count = 0
+		self.slot = 0
+
+	def append(self, value: np.ndarray) -> np.ndarray:
+		"""Append a vector and return the current moving average."""
+		if self.count == self.length:
+			self.sum -= self.history[self.slot]
+		else:
+			self.count += 1
+		self.history[self.slot] = value
+		self.sum += value
+		self.slot = (self.slot + 1) % self.length
+		if self.slot == 0:
+			# Resynchronize the running sum, avoids accumulation of round-off errors.
+			self.sum = self.history[:self.count].sum(0)
+		np.divide(self.sum, self.count, out=self.mean)
+		return self.mean
@@ -5,16 +5,30 @@ import logging
 from typing import Any
 import numpy as np
 from scipy import signal
-from collections import deque
 import threading
 import multiprocessing
-from labyrinth import Labyrinth
+from motor import MotorService
+from ringbuffer import RingBuffer, MetricHistory
+from bandpower import WelchBandPower, RunningMean
+from peaks import PeakDetector, PeakIndex
+from scheduler import TickScheduler, tick_period
+from gameworker import SharedFrameBuffer, ACTIONS, game_worker, copy_quantities
 
 from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds, BrainFlowError
 from brainflow.data_filter import DataFilter, FilterTypes, AggOperations, NoiseTypes, WindowFunctions, DetrendOperations
 from brainflow.ml_model import BrainFlowMetrics, BrainFlowClassifiers, BrainFlowModelParams, MLModel
 
 WINDOW_SIZE = 5 # Seconds
+STREAMING_FILTER = True # Filter only newly arrived samples. If False, refilter the whole window every tick (legacy).
+BATCHED_FILTER = True # Filter all active channels in a single call. If False, loop over the channels.
+NUMPY_INFERENCE = True # Evaluate the regression classifier in NumPy for all players at once, if possible.
+TICK_HOP_SAMPLES = 10 # Tick the game logic every N new samples (None to disable).
+TICK_HOP_TIME = None # Tick the game logic every X seconds (None to disable).
+PEAK_MIN_WIDTH = 0.75 # Seconds the focus metric must stay above the threshold for a peak.
+BAND_POWER_AVERAGE = 0.5 # Seconds of band powers in the moving average.
+GAME_WORKER_PROCESS = False # Run the game logic in a worker process, publishing frames via shared memory.
+WARM_STANDBY = True # Keep the board streaming between games, such that a game starts with a full window.
+STANDBY_BUFFER_SIZE = 10 # Seconds of data kept by the board while in standby, older data is discarded.
 
 def parse_arguments():
 	"""
@@ -89,6 +103,10 @@ def set_differential_mode(board_shim: BoardShim, active_channels: list[int]):
 	# Send configuration to the board.
 	board_shim.config_board(''.join(ch_settings))
 
+def num_ticks(seconds: float, sampling_rate: int) -> int:
+	"""No. of game ticks in the given duration, at the nominal tick rate."""
+	return max(1, round(seconds/tick_period(sampling_rate, TICK_HOP_SAMPLES, TICK_HOP_TIME)))
+
 class Board:
 	"""Base class containing BoardShim details and settings."""
 	def __init__(self, board_shim: BoardShim, active_channels: list[int]):
@@ -106,115 +124,218 @@ class Board:
 		if self.board_id == BoardIds.SYNTHETIC_BOARD:
 			self.eeg_channels = [1, 2, 3, 4, 5, 6, 7, 8]
 
+class BandPowerFeatures(Board):
+	"""
+	Per-tick feature stage shared by all consumers of the band powers. The 
+	band power vector of a channel is computed once per tick and cached.
+	"""
+	def __init__(self, board_shim: BoardShim, active_channels: list[int]):
+		super().__init__(board_shim, active_channels)
+		self.estimators = {channel: WelchBandPower(self.sampling_rate, self.num_points) for channel in self.active_channels}
+		self.cache = {channel: (None, None) for channel in self.active_channels}
+		# Counters for profiling.
+		self.hits = 0
+		self.misses = 0
+
+	def get_band_power(self, data: np.ndarray, channel: int, num_samples: int):
+		"""
+		Relative band powers of the given channel at the current tick. 5 Bands: 
+		1.5-4Hz, 4-8Hz, 7.5-13Hz, 13-30Hz, 30-45Hz. `num_samples` is the total 
+		sample count, identifying the tick.
+		"""
+		tick, band_power = self.cache[channel]
+		if tick == num_samples:
+			self.hits += 1
+			return band_power
+		self.misses += 1
+		band_power = self.estimators[channel].update(data[channel], num_samples)
+		self.cache[channel] = (num_samples, band_power)
+		return band_power
+
+	def get_stats(self):
+		"""Cache hit/miss counters."""
+		return {'hits': self.hits, 'misses': self.misses}
+
 class AvgBandPower(Board):
 	"""Class for calculating average band power from time series data."""
-	def __init__(self, board_shim: BoardShim, active_channels: list[int], channel: int):
+	def __init__(self, board_shim: BoardShim, active_channels: list[int], channel: int, features: BandPowerFeatures):
 		super().__init__(board_shim, active_channels)
-		# Allocate deque for tracking average band power.
-		self.avg_band_power = deque([], maxlen=100)
-		self.avg_band_power.append(np.zeros(5))
+		# Moving average over the ticks of the last BAND_POWER_AVERAGE seconds.
+		self.avg_band_power = RunningMean(num_ticks(BAND_POWER_AVERAGE, self.sampling_rate), 5)
+		self.features = features
 		self.channel = channel
 
-	def get_band_power(self, data: np.ndarray):
+	def get_band_power(self, data: np.ndarray, num_samples: int):
 		"""
 		Calculate average band power from the time series data. 5 Bands: 
-		1-4Hz, 4-8Hz, 8-13Hz, 13-30Hz, 30-50Hz.
+		1.5-4Hz, 4-8Hz, 7.5-13Hz, 13-30Hz, 30-45Hz.
 		"""
-		avg, std = DataFilter.get_avg_band_powers(data, [self.channel], self.sampling_rate, True)
-		self.avg_band_power.append(avg)
-		current_band_power = np.array(self.avg_band_power).mean(0)
+		band_power = self.features.get_band_power(data, self.channel, num_samples)
+		current_band_power = self.avg_band_power.append(band_power).copy()
 		return current_band_power
 
 class MLClassifier:
-	"""Simpleton class containing the BrainFlow metric classifier."""
-	model = None
-	model_params = None
+	"""
+	Process-wide registry of prepared BrainFlow metric classifiers. Each 
+	(metric, classifier) pair is prepared once and reference-counted by its 
+	users. Models are kept warm when unused, such that a new game can start 
+	without paying the model loading cost again.
+	"""
+	models = {}
+	ref_counts = {}
 
 	@classmethod
-	def configure(cls, metric: BrainFlowMetrics=BrainFlowMetrics.RELAXATION, 
-	             classifier: BrainFlowClassifiers=BrainFlowClassifiers.REGRESSION):
-		"""Create and configure the classifier."""
-		if cls.model is not None:
-			cls.destroy_model()
-		cls.model_params = BrainFlowModelParams(metric, classifier)
-		cls.model = MLModel(cls.model_params)
-		cls.model.enable_ml_logger()
-		cls.model.prepare()
-		return cls
-	
+	def prepare(cls, metric: BrainFlowMetrics=BrainFlowMetrics.RELAXATION, 
+	            classifier: BrainFlowClassifiers=BrainFlowClassifiers.REGRESSION):
+		"""Prepare the classifier, unless it is already prepared."""
+		key = (metric, classifier)
+		if key not in cls.models:
+			model = MLModel(BrainFlowModelParams(metric, classifier))
+			model.enable_ml_logger()
+			model.prepare()
+			cls.models[key] = model
+			cls.ref_counts[key] = 0
+			logging.info(f"ML classifier: Prepared model: metric={metric.name}, classifier={classifier.name}")
+		return cls.models[key]
+
+	@classmethod
+	def acquire(cls, metric: BrainFlowMetrics=BrainFlowMetrics.RELAXATION, 
+	            classifier: BrainFlowClassifiers=BrainFlowClassifiers.REGRESSION):
+		"""Get a prepared classifier and register a new user of it."""
+		model = cls.prepare(metric, classifier)
+		cls.ref_counts[(metric, classifier)] += 1
+		return model
+
 	@classmethod
-	def destroy_model(cls):
-		"""Safely destroy the classifer."""
-		cls.model.release()
-		cls.model = None
-		cls.model_params = None
+	def release(cls, metric: BrainFlowMetrics=BrainFlowMetrics.RELAXATION, 
+	            classifier: BrainFlowClassifiers=BrainFlowClassifiers.REGRESSION):
+		"""Unregister a user of the classifier. The model is kept prepared."""
+		key = (metric, classifier)
+		if cls.ref_counts.get(key, 0) > 0:
+			cls.ref_counts[key] -= 1
+
+	@classmethod
+	def destroy_all(cls):
+		"""Safely destroy all classifiers, to be called at program exit."""
+		for model in cls.models.values():
+			model.release()
+		cls.models = {}
+		cls.ref_counts = {}
+
+class NumpyRegression:
+	"""
+	Pure-NumPy equivalent of the BrainFlow regression classifier, a logistic
+	regression. The coefficients are recovered by probing the prepared 
+	BrainFlow model, and evaluated for all feature vectors in a single pass.
+	"""
+	def __init__(self, weights: np.ndarray, intercept: float):
+		self.weights = weights
+		self.intercept = intercept
+
+	@classmethod
+	def from_model(cls, model: MLModel, num_features: int=10, eps: float=1e-3):
+		"""Probe the model, return None if it does not behave as a logistic regression."""
+		def logit(p):
+			return np.log(p/(1-p))
+		intercept = logit(model.predict(np.zeros(num_features)))
+		weights = np.array([logit(model.predict(eps*np.eye(num_features)[i])) - intercept
+		                    for i in range(num_features)]) / eps
+		regression = cls(weights, intercept)
+		# Verify against the BrainFlow model on a few typical feature vectors.
+		rng = np.random.default_rng(0)
+		probe = np.zeros((4, num_features))
+		probe[:, :5] = rng.dirichlet(np.ones(5), size=4)
+		expected = np.array([model.predict(x) for x in probe])
+		if not np.all(np.isfinite(weights)) or not np.allclose(regression.predict(probe), expected, atol=1e-6):
+			return None
+		return regression
+
+	def predict(self, features: np.ndarray) -> np.ndarray:
+		"""Metric values for a (players, features) array of feature vectors."""
+		return 1.0 / (1.0 + np.exp(-(features @ self.weights + self.intercept)))
+
+class BatchedInference:
+	"""Evaluates the focus metric classifier for all players in one call."""
+	def __init__(self, model: MLModel, use_numpy: bool=NUMPY_INFERENCE):
+		self.model = model
+		self.regression = None
+		if use_numpy:
+			self.regression = NumpyRegression.from_model(model)
+			if self.regression is None:
+				logging.info("Batched inference: Classifier is not a logistic regression, using BrainFlow model")
+
+	def predict(self, features: np.ndarray) -> np.ndarray:
+		"""Metric values for a (players, features) array of feature vectors."""
+		if self.regression is not None:
+			return self.regression.predict(features)
+		return np.array([self.model.predict(x) for x in features])
 
 class FocusMetric(Board):
 	"""Class for calculating the BrainFlow focus metric from time series data."""
-	def __init__(self, board_shim: BoardShim, active_channels: list[int], channel: int, previous_metric: list, previous_time: list):
+	def __init__(self, board_shim: BoardShim, active_channels: list[int], channel: int, 
+	             features: BandPowerFeatures, previous_metric: list, previous_time: list):
 		super().__init__(board_shim, active_channels)
+		# One metric value per tick, over the plotted window.
+		capacity = num_ticks(WINDOW_SIZE, self.sampling_rate)
 		if previous_metric is None:
-			self.metric = deque([0], maxlen=self.num_points) 
-			self.time = deque([time.time()], maxlen=self.num_points)
+			self.history = MetricHistory(capacity)
+			self.history.append(time.time(), 0)
 		else:
-			self.metric = deque([], maxlen=self.num_points)
-			for m in previous_metric:
-				self.metric.append(m)
-			self.time = deque([], maxlen=self.num_points)
-			now = time.time()
-			for t in previous_time:
-				self.time.append(t+now)
-
-		classifier = MLClassifier.configure() # TODO: GET INPUT FROM SETTINGS DIALOGUE
-		self.model = classifier.model
-		self.model_params = classifier.model_params
+			self.history = MetricHistory(capacity, previous_time+time.time(), previous_metric)
+
+		self.features = features
 		self.channel = channel
+		# Feature vector: band power averages and standard deviations (zero for a single channel).
+		self.feature_vector = np.zeros(10)
 
-	def get_metric(self, data: np.ndarray):
-		"""From time series data, get current focus metric estimate."""
-		# Get metric estimate. 
-		bands = DataFilter.get_avg_band_powers(data, [self.channel], self.sampling_rate, True)
-		feature_vector = np.concatenate((bands[0], bands[1]))
-		metric = self.model.predict(feature_vector)
-		self.metric.append(metric)
+	def get_feature_vector(self, data: np.ndarray, num_samples: int):
+		"""From time series data, get the feature vector for the classifier."""
+		self.feature_vector[:5] = self.features.get_band_power(data, self.channel, num_samples)
+		return self.feature_vector
+
+	def get_metric(self, data: np.ndarray, metric: float):
+		"""Record the current focus metric estimate, evaluated by the classifier."""
 		# Get time corresponding to the metric value.
 		time = data[self.timestamp_channel, -1]
-		self.time.append(time)
+		self.history.append(time, metric)
 
-		relative_time = np.array(self.time)-time
-		return list(self.time), list(relative_time), list(self.metric)
+		relative_time = self.history.get_relative_time(time)
+		return self.history.get_time(), relative_time, self.history.get_metric()
 
 class TimeSeries(Board):
 	"""Class for extracting the time series data for a specific player."""
 	def __init__(self, board_shim: BoardShim, active_channels: list[int], channel: int):
 		super().__init__(board_shim, active_channels)
 		self.channel = channel # The channel associated with the player.
-		self.time = list(reversed(-np.arange(0, self.num_points)/self.sampling_rate))
-		self.timeseries = np.zeros(self.num_points)
+		self.time = np.ascontiguousarray(-np.arange(0, self.num_points)[::-1]/self.sampling_rate)
 
 	def get_time_series(self, data: np.ndarray):
-		"""Get the timeseries for the given player"""
+		"""Get the timeseries for the given player, as a view of the data."""
 		timeseries = data[self.channel]
-		#self.timeseries[(self.num_points-len(timeseries)):] = timeseries
-		return  self.time, list(timeseries)
+		return  self.time, timeseries
 
 class Player:
 	"""Class collecting all player specific logic."""
-	def __init__(self, board_shim: BoardShim, active_channels: list[int], channel: int, old_playerinfo):
+	def __init__(self, board_shim: BoardShim, active_channels: list[int], channel: int, 
+	             features: BandPowerFeatures, old_playerinfo):
 		if old_playerinfo is None:
 			previous_abs_time, previous_rel_time, previous_metric = (None, None, None)
 		else:
 			previous_abs_time, previous_rel_time, previous_metric = old_playerinfo['focus_metric']
 		self.timeseries = TimeSeries(board_shim, active_channels, channel)
-		self.bandp = AvgBandPower(board_shim, active_channels, channel)
-		self.focus = FocusMetric(board_shim, active_channels, channel, previous_metric, previous_rel_time)
+		self.bandp = AvgBandPower(board_shim, active_channels, channel, features)
+		self.focus = FocusMetric(board_shim, active_channels, channel, features, previous_metric, previous_rel_time)
+
+	def get_feature_vector(self, data: np.ndarray, num_samples: int):
+		"""Feature vector for the focus metric classifier at the current timestep."""
+		return self.focus.get_feature_vector(data, num_samples)
 
-	def update(self, data: np.ndarray):
+	def update(self, data: np.ndarray, num_samples: int, metric: float):
 		"""Update derived quantities for the current timestep."""
 		# Calculate all derived quantities, such as band power, focus metric etc.
 		time, timeseries = self.timeseries.get_time_series(data)
-		band_power  = self.bandp.get_band_power(data)
-		abs_time, rel_time, metric  = self.focus.get_metric(data)
+		band_power  = self.bandp.get_band_power(data, num_samples)
+		abs_time, rel_time, metric  = self.focus.get_metric(data, metric)
 		# Collect all quantities to be plotted in a dictionary.
 		player_info = {
 			'time_series': (time, timeseries),
@@ -225,11 +346,57 @@ class Player:
 
 class FilterData(Board):
 	"""Class responsible for filtering of the raw time series data."""
-	def __init__(self, board_shim: BoardShim, active_channels: list[int]):
+	def __init__(self, board_shim: BoardShim, active_channels: list[int], 
+	             streaming: bool=STREAMING_FILTER, batched: bool=BATCHED_FILTER):
 		super().__init__(board_shim, active_channels)
+		self.streaming = streaming
+		self.batched = batched
+		# Rows of the data array to be filtered, as an index array for batched access.
+		self.channel_index = np.array(self.active_channels)
+		# Cascade of second-order sections, with filter state kept per active channel.
+		self.sos = self.__design_filters()
+		self.zi = None # Shape: (sections, channels, 2)
+
+	def __design_filters(self):
+		"""
+		Design the SOS equivalent of the BrainFlow filter chain: 50Hz notch, 
+		5-75Hz bandpass and 98-102Hz bandstop, all Butterworth. When streaming,
+		detrending is covered by the lower edge of the bandpass filter.
+		"""
+		nyquist = self.sampling_rate/2
+		sections = [
+			signal.butter(2, [48.0, 52.0], btype='bandstop', fs=self.sampling_rate, output='sos'),
+			signal.butter(3, [5.0, min(75.0, 0.95*nyquist)], btype='bandpass', fs=self.sampling_rate, output='sos'),
+		]
+		if 102.0 < nyquist:
+			sections.append(signal.butter(3, [98.0, 102.0], btype='bandstop', fs=self.sampling_rate, output='sos'))
+		return np.vstack(sections)
+
+	def filter_stream(self, data: np.ndarray):
+		"""Filter newly arrived samples in-place, continuing from the previous filter state."""
+		if data.shape[1] == 0:
+			return
+		if self.zi is None:
+			# Start in steady state w.r.t. the first sample, avoids start-up transients.
+			zi = signal.sosfilt_zi(self.sos)
+			self.zi = zi[:, np.newaxis, :] * data[self.channel_index, 0][np.newaxis, :, np.newaxis]
+		if self.batched:
+			# All active channels at once, filtering along the time axis.
+			data[self.channel_index], self.zi = signal.sosfilt(self.sos, data[self.channel_index], axis=1, zi=self.zi)
+		else:
+			for i, channel in enumerate(self.active_channels):
+				data[channel], self.zi[:, i, :] = signal.sosfilt(self.sos, data[channel], zi=self.zi[:, i, :])
 
 	def filter_data(self, data: np.ndarray):
-		"""Apply filtering to the current timestep."""
+		"""Apply filtering to the whole window of the current timestep (legacy)."""
+		if self.batched:
+			# Linear detrend (includes constant detrend) followed by the filter chain.
+			x = data[self.channel_index]
+			t = np.arange(x.shape[1]) - 0.5*(x.shape[1]-1) # Centered time axis.
+			slope = (x @ t) / (t @ t)
+			x -= x.mean(axis=1, keepdims=True) + slope[:, np.newaxis]*t
+			data[self.channel_index] = signal.sosfilt(self.sos, x, axis=1)
+			return
 		# Only filter active channels.
 		for i, channel in enumerate(self.active_channels):
 			# Constant detrend, i.e. center data at y = 0
@@ -256,10 +423,14 @@ class FilterData(Board):
 			                            FilterTypes.BUTTERWORTH.value, 0)
 			"""
 class Action:
-	def __init__(self, sampling_rate) -> None:
+	def __init__(self, sampling_rate, window_size: float=WINDOW_SIZE) -> None:
 		self.p1_actions = ['LEFT', 'RIGHT']
 		self.p2_actions = ['FORWARD', 'BACKWARD']
-		self.old_peaks = [[],[]]
+		# Online peak detectors, and indices of the peaks within the metric window.
+		min_width = num_ticks(PEAK_MIN_WIDTH, sampling_rate)
+		self.detectors = [PeakDetector(height=0.900, min_width=min_width), PeakDetector(height=0.900, min_width=min_width)]
+		self.old_peaks = [PeakIndex(window_size), PeakIndex(window_size)]
+		self.first_peak = [True, True]
 		self.position_1 = 0
 		self.position_2 = 0
 		self.sampling_rate = sampling_rate
@@ -274,22 +445,30 @@ class Action:
 		actions = [p1_action, p2_action]
 		return actions
 
+	def _record_peak(self, t: float, player: int):
+		"""Insert a peak into the player's peak index."""
+		self.old_peaks[player].insert(t)
+		self.first_peak[player] = False
+
+	def get_stats(self):
+		"""Peak index counters of both players."""
+		return [old_peaks.get_stats() for old_peaks in self.old_peaks]
+
 	def _decide(self, quantity: dict[str, Any], player: int):
 		abs_time, _, metric = quantity['focus_metric']
-		peaks, _ = signal.find_peaks(metric, height=0.900, width=150)
+		# Only the metric samples since the last tick are processed.
+		peaks = self.detectors[player].update(abs_time, metric)
+		# Expire peaks which are older than the metric window.
+		self.old_peaks[player].expire(abs_time[-1])
 		# For every peak
-		for peak in peaks:
-			if self.old_peaks[player]:
-				t = abs_time[peak]
-				comparison = np.abs(t - np.array(self.old_peaks[player]))
-				min_dt = np.min(comparison)
-
-				if min_dt < 15/self.sampling_rate:
+		for t in peaks:
+			if not self.first_peak[player]:
+				if self.old_peaks[player].nearest_distance(t) < 15/self.sampling_rate:
 					return None # Samma peak som tidigare
 				else:
 					# Ny peak
 					if player == 0: # PLAYER ONE
-						self.old_peaks[player].append(t)
+						self._record_peak(t, player)
 						if self.position_1 == 0:
 							self.position_1 = 1
 							return "LEFT"
@@ -297,7 +476,7 @@ class Action:
 							self.position_1 = 0
 							return "RIGHT"
 					else: # PLAYER TWO
-						self.old_peaks[player].append(t)
+						self._record_peak(t, player)
 						if self.position_2 == 0:
 							#Labyrint.turn_left(2)
 							self.position_2 = 1
@@ -308,40 +487,14 @@ class Action:
 			else:
 				# First peak
 				if player == 0:
-					self.old_peaks[player].append(abs_time[peak])
+					self._record_peak(t, player)
 					self.position_1 = 0
 					return "RIGHT"
 				else:
-					self.old_peaks[player].append(abs_time[peak])
+					self._record_peak(t, player)
 					self.position_2 = 0
 					return "BACKWARD"
 
-def motor_logic(queue: multiprocessing.Queue) -> None:
-	"""Main function to handle interface with servos."""
-	lab = Labyrinth("COM3") # TODO: FIX THIS HARDCODING, MAKE IT SELECTABLE FROM THE GUI
-	while True:
-		# Pick item from the queue.
-		action = queue.get()
-		# Handle certain special cases.
-		if action == "end": # to be called at program exit
-			break
-		elif action == "reset": # to be called at braingame.stop_game
-			# TODO: Return to starting configuration.
-			continue
-		# Act according to action.
-		print(action)
-		if action == "LEFT":
-			lab.turn_left(1)
-		elif action == "RIGHT":
-			lab.turn_right(1)
-		elif action == "FORWARD":
-			lab.turn_left(2)
-		elif action == "BACKWARD":
-			lab.turn_right(2)
-	# Safely shut down program.
-	lab.__del__()
-
-
 class GameLogic(Board):
 	"""Class containing and collecting the main game logic."""
 	def __init__(self, board_shim: BoardShim, active_channels: list[int], init_data: np.ndarray, old_quantities=None):
@@ -350,29 +503,58 @@ class GameLogic(Board):
 			(q1, q2) = None, None
 		else:
 			(q1, q2) = old_quantities
-		self.p1 = Player(board_shim, active_channels, active_channels[0], q1)
-		self.p2 = Player(board_shim, active_channels, active_channels[1], q2)
+		# Band powers are computed once per channel and tick, shared by both players' stages.
+		self.features = BandPowerFeatures(board_shim, active_channels)
+		self.p1 = Player(board_shim, active_channels, active_channels[0], self.features, q1)
+		self.p2 = Player(board_shim, active_channels, active_channels[1], self.features, q2)
+		# Focus metric inference for both players in one call.
+		self.model = MLClassifier.acquire() # TODO: GET INPUT FROM SETTINGS DIALOGUE
+		self.inference = BatchedInference(self.model)
+		self.feature_matrix = np.zeros((2, 10))
 		self.filter = FilterData(board_shim, active_channels)
 		self.act = Action(self.sampling_rate)
-		if init_data is not None:
-			self.init_data = init_data
-		else: 
-			self.init_data = np.zeros((self.num_channels, self.num_points))
+		# Preallocated ring buffer, only the new samples are ingested every tick.
+		self.buffer = RingBuffer(self.num_channels, self.num_points, init_data)
+		self.prefilled = init_data is not None
+		# Working array for the legacy filtering stage, which operates in-place.
+		self.data = np.zeros((self.num_channels, self.num_points))
 	
-	def update(self):
-		"""Update game logic. Equivalent to advancing game one step forwards in time."""
-		# Collect data from BCI board.
-		data = self.board_shim.get_current_board_data(self.num_points)
+	def ingest(self, new_data: np.ndarray):
+		"""Filter new samples into the window."""
+		if self.filter.streaming:
+			# Filter only the new samples, the buffer holds filtered data.
+			self.filter.filter_stream(new_data)
+			self.buffer.append(new_data)
+			self.data = self.buffer.view()
+		else:
+			# Copy the current window into the working array, without reallocation.
+			self.buffer.append(new_data)
+			np.copyto(self.data, self.buffer.view())
+			# Filter the raw data, denoise the signal.
+			self.filter.filter_data(self.data)
+
+	def warm_start(self, data: np.ndarray):
+		"""Fill the window with data recorded before the game started, e.g. in standby."""
+		# One extra second lets the streaming filters settle before the window.
+		self.ingest(data[:, -(self.num_points + self.sampling_rate):])
 
-		# Merge into init/old data array.
-		self.data = self.__merge_data(data)
+	def is_window_full(self) -> bool:
+		"""True when the whole window holds recorded (or restored) data."""
+		return self.prefilled or self.buffer.num_samples >= self.num_points
 
-		# Filter the raw data, denoise the signal.
-		self.filter.filter_data(self.data)
+	def update(self):
+		"""Update game logic. Equivalent to advancing game one step forwards in time."""
+		# Collect the new data from the BCI board since the last tick.
+		new_data = self.board_shim.get_board_data()
+		self.ingest(new_data)
 
 		# Send data to players, calculate all derived quantities
-		q1 = self.p1.update(self.data)
-		q2 = self.p2.update(self.data)
+		num_samples = self.buffer.num_samples
+		self.feature_matrix[0] = self.p1.get_feature_vector(self.data, num_samples)
+		self.feature_matrix[1] = self.p2.get_feature_vector(self.data, num_samples)
+		metrics = self.inference.predict(self.feature_matrix)
+		q1 = self.p1.update(self.data, num_samples, metrics[0])
+		q2 = self.p2.update(self.data, num_samples, metrics[1])
 		quantities = (q1, q2)
 
 		# Decide and send actions to arduino.
@@ -381,22 +563,9 @@ class GameLogic(Board):
 		# Send derived quantities to GUI for plotting.
 		return quantities, actions, self.data
 
-	def __merge_data(self, data_in: np.ndarray):
-		"""
-		If data array is smaller than maximum allowed size, merge the new 
-		data into the array of initial/old data.
-		"""
-		if data_in.shape[1] < self.num_points:
-			data_out = np.zeros_like(self.init_data)
-			data_out[:, :(self.num_points- data_in.shape[1])] = self.init_data[:, data_in.shape[1]:]
-			data_out[:, (self.num_points- data_in.shape[1]):] = data_in
-		else:
-			data_out = data_in
-		return data_out
-
 	def destroy(self):
 		"""Safely destroy the main game logic."""
-		MLClassifier().destroy_model()
+		MLClassifier.release()
 
 
 class BrainGameInterface:
@@ -424,18 +593,36 @@ class BrainGameInterface:
 		self.board_shim = None
 		self.gamelogic = None
 		self.game_is_running = False
+		self.settings_applied = False # The game worker prepares its own board session from the applied settings.
 		self.previous_data = None
-		self.queue = None
-
-	def callback_apply_settings(self):
-		"""Apply current settings to the board."""
+		self.previous_quantities = None
+		self.previous_actions = [None, None]
+		self.scheduler = None
+		# Board streaming state, and the time to the first valid frame of a game.
+		self.is_streaming = False
+		self.start_time = None
+		# Motor process, owning the Arduino link across game sessions.
+		self.motor = MotorService()
+		# Game worker process and its shared frames, if enabled.
+		self.worker = None
+		self.frames = None
+
+	def callback_apply_settings(self, progress=None):
+		"""
+		Apply current settings to the board. The optional `progress` callback is
+		called with the name of each completed stage.
+		"""
+		def report(stage: str):
+			if progress is not None:
+				progress(stage)
 		
 		# Break early if there's no new settings to apply.
-		if self.board_shim is not None and not self.__has_settings_changed():
+		if self.__is_board_ready() and not self.__has_settings_changed():
 			logging.info("Apply settings: No new settings to apply")
 			return True
 		# Stop the session.
-		self.stop_game()
+		self.stop_game(keep_standby=False)
+		self.settings_applied = False
 		# Apply new settings.
 		self.board_id = self.board_id_tmp
 		self.active_channels = self.active_channels_tmp
@@ -447,30 +634,61 @@ class BrainGameInterface:
 			self.board_shim = BoardShim(self.board_id, self.params)
 			self.board_shim.prepare_session()
 			logging.info('Apply settings: Board shim prepared')
+			report("board")
 
-			# Activate differential mode.
-			if self.board_shim.board_id == BoardIds.CYTON_BOARD:
-				set_differential_mode(self.board_shim, self.active_channels)
-				logging.info("Applying settings: Differential mode set")
+			if GAME_WORKER_PROCESS:
+				# The board answers. The game worker prepares its own session, differential mode and classifier.
+				self.release_board()
+			else:
+				# Activate differential mode.
+				if self.board_shim.board_id == BoardIds.CYTON_BOARD:
+					set_differential_mode(self.board_shim, self.active_channels)
+					logging.info("Applying settings: Differential mode set")
+					report("differential")
 
-			logging.info("Apply settings: Board shim initialized")
-			
-			# TODO: Initialize Arduino.
+				logging.info("Apply settings: Board shim initialized")
+
+				# Prepare the focus metric classifier ahead of the game start.
+				MLClassifier.prepare()
+				report("classifier")
 			
-			self.queue = multiprocessing.Queue()
-			self.motor_process = multiprocessing.Process(target=motor_logic, args=(self.queue,))
-			self.motor_process.start()
+			# Start the motor service, unless it is already running. A missing link is
+			# not an error, the service keeps reconnecting in the background.
+			self.motor.start()
+			if self.motor.get_state() == "connecting":
+				report("motor_connecting")
+			motor_state = self.motor.wait_connected()
+			logging.info(f"Apply settings: Motor service {motor_state}")
+			# Still connecting after the wait is not a failure, the stage stays on the loading screen.
+			if motor_state == "connected":
+				report("motor_connected")
+			elif motor_state != "connecting":
+				report("motor_disconnected")
+
+			# Keep the board streaming while waiting for the game to start.
+			if WARM_STANDBY and not GAME_WORKER_PROCESS:
+				self.start_standby()
 
 			# TODO: CORRECT ERROR CHECKING AND HANDLING OF EXCEPTIONS
 			
+			self.settings_applied = True
 			return True
 
 		except BaseException:
 			# Error handling.
 			logging.warning('Exception', exc_info=True)
-			self.stop_game()
+			self.stop_game(keep_standby=False)
 			return False
 
+	def start_standby(self):
+		"""Start streaming into the board's ring buffer, which discards data older than the standby buffer size."""
+		if self.is_streaming:
+			return
+		sampling_rate = BoardShim.get_sampling_rate(self.board_id)
+		self.board_shim.start_stream(STANDBY_BUFFER_SIZE * sampling_rate, self.streamer_params)
+		self.is_streaming = True
+		logging.info("Standby: Board streaming")
+
 	def callback_discard_settings(self):
 		"""Discard current settings."""
 		self.board_id_tmp = self.board_id
@@ -478,6 +696,12 @@ class BrainGameInterface:
 		self.serial_port_tmp = self.params.serial_port
 		logging.info("Settings discarded")
 
+	def __is_board_ready(self):
+		"""True if a game can start without applying the settings."""
+		if GAME_WORKER_PROCESS:
+			return self.settings_applied
+		return self.board_shim is not None and self.board_shim.is_prepared()
+
 	def __has_settings_changed(self):
 		"""Return true if current settings are different from old settings."""
 		if (self.board_id == self.board_id_tmp
@@ -504,14 +728,12 @@ class BrainGameInterface:
 		if self.game_is_running:
 			print("Start game: Game is already started")
 			return
-		# Verify that a session is prepared.
-		if self.board_shim is None or not self.board_shim.is_prepared():
+		self.start_time = time.perf_counter()
+		# Verify that the settings are applied, with a prepared session unless the game worker prepares it.
+		if not self.__is_board_ready():
 			logging.info("Start game: Need apply settings first")
 			self.callback_apply_settings()
 		try: 
-			# Start streaming session.
-			self.board_shim.start_stream(450000, self.streamer_params)
-			
 			# Create the game logic.
 			if self.previous_data is None or fresh_start:
 				init_data = None
@@ -519,8 +741,25 @@ class BrainGameInterface:
 			else:
 				init_data = self.previous_data
 				old_quantities = self.previous_quantities
-			self.gamelogic = GameLogic(self.board_shim, self.active_channels, init_data, old_quantities)
-			logging.info("Start game: Game logic created")
+
+			if GAME_WORKER_PROCESS:
+				self.__start_worker(init_data, old_quantities)
+				logging.info("Start game: Game worker started")
+			else:
+				self.gamelogic = GameLogic(self.board_shim, self.active_channels, init_data, old_quantities)
+				logging.info("Start game: Game logic created")
+				if self.is_streaming:
+					# Warm start from the data recorded in standby.
+					self.gamelogic.warm_start(self.board_shim.get_board_data())
+					logging.info("Start game: Warm start from standby data")
+				else:
+					# Start streaming session.
+					self.board_shim.start_stream(450000, self.streamer_params)
+					self.is_streaming = True
+
+				# Pace the game logic by the arrival of new samples.
+				self.scheduler = TickScheduler(self.board_shim, self.gamelogic.sampling_rate, 
+				                               hop_samples=TICK_HOP_SAMPLES, hop_time=TICK_HOP_TIME)
 		
 			# Start threading
 			self.game_is_running = True
@@ -538,16 +777,76 @@ class BrainGameInterface:
 			self.stop_game()
 			raise Exception("Could not start game logic loop")
 	
+	def __start_worker(self, init_data, old_quantities):
+		"""Start the game logic in a worker process, which owns the board session."""
+		sampling_rate = BoardShim.get_sampling_rate(self.board_id)
+		num_points = WINDOW_SIZE * sampling_rate
+		num_channels = BoardShim.get_num_rows(self.board_id)
+		# Hand over the board to the worker.
+		self.release_board()
+		self.frames = SharedFrameBuffer(num_channels, num_points, create=True)
+		self.action_counts = np.zeros(2, dtype=np.int64)
+		self.stop_event = multiprocessing.Event()
+		self.worker = multiprocessing.Process(target=game_worker, daemon=True,
+		                                      args=(self.board_id, self.params, self.active_channels, self.streamer_params, 
+		                                            self.frames.name, self.stop_event, self.motor.queue, init_data, old_quantities))
+		self.worker.start()
+
+	def __read_worker_frame(self):
+		"""Wait for the next frame published by the game worker. Stops the game if the worker died."""
+		while self.game_is_running:
+			if not self.worker.is_alive():
+				logging.warning(f"Update game: Game worker died (exit code {self.worker.exitcode}), stopping the game")
+				self.stop_game()
+				break
+			result = self.frames.read(self.active_channels)
+			if result is None:
+				time.sleep(0.002)
+				continue
+			seq, frame = result
+			# Actions are cumulative counters in the frames, no action is lost on skipped frames.
+			actions = [None, None]
+			for p in range(2):
+				if frame['action_count'][p] != self.action_counts[p]:
+					actions[p] = ACTIONS[frame['last_action'][p]]
+					self.action_counts[p] = frame['action_count'][p]
+			self.previous_data = frame['data']
+			self.previous_quantities = frame['quantities']
+			self.previous_actions = actions
+			return frame['quantities'], actions, frame['data']
+		return self.previous_quantities, self.previous_actions, self.previous_data
+
+	def __stop_worker(self):
+		"""Stop the game worker, keep a copy of the last frame for game restarts."""
+		self.stop_event.set()
+		self.worker.join(timeout=10)
+		if self.previous_quantities is not None:
+			self.previous_data = np.array(self.previous_data)
+			self.previous_quantities = copy_quantities(self.previous_quantities)
+		self.frames.close()
+		self.frames.unlink()
+		self.frames = None
+		self.worker = None
+
 	def update_game(self):
-		"""Update gamelogic one step."""
+		"""Update gamelogic one step, as soon as the next tick is due."""
+		if GAME_WORKER_PROCESS:
+			return self.__read_worker_frame()
+		# Wait for the next tick. If the game was stopped meanwhile, return the last game info.
+		if not self.scheduler.wait(lambda: self.game_is_running):
+			return self.previous_quantities, self.previous_actions, self.previous_data
 		# Update game logic one step, collect game info.
 		quantities, actions, data = self.gamelogic.update()
+		self.scheduler.done()
+		if self.start_time is not None and self.gamelogic.is_window_full():
+			logging.info(f"Update game: Time to first valid frame: {1e3*(time.perf_counter() - self.start_time):.1f} ms")
+			self.start_time = None
 		# Send actions to the motor logic
 		[act1, act2] = actions
 		if act1 is not None:
-			self.queue.put(act1) # TODO: SEND ACTIONS
+			self.motor.send(act1)
 		if act2 is not None:
-			self.queue.put(act2) # TODO: SEND ACTIONS
+			self.motor.send(act2)
 		# Save quantities to enable game restarts from old data.
 		self.previous_data = data
 		self.previous_quantities = quantities
@@ -567,32 +866,48 @@ class BrainGameInterface:
 	#	self.previous_quantities = quantities
 	#	self.previous_actions = actions
 
-	def stop_game(self):
-		"""Stop the main game."""
+	def stop_game(self, keep_standby: bool=WARM_STANDBY):
+		"""Stop the main game. In standby, the board is kept streaming for the next game."""
 		# Halt any running game session.
 		if self.game_is_running:
 			# Stop game loop.
 			self.game_is_running = False
 			# Join Thread.
 			logging.info("Stop game: Game logic stopped")
-			# Clean up game logic
-			self.gamelogic.destroy()
-			self.gamelogic = None
-			logging.info("Stop game: Game logic destroyed")
+			if GAME_WORKER_PROCESS:
+				self.__stop_worker()
+				logging.info("Stop game: Game worker stopped")
+			else:
+				logging.info(f"Stop game: Tick statistics: {self.scheduler.get_stats()}")
+				# Clean up game logic
+				self.gamelogic.destroy()
+				self.gamelogic = None
+				logging.info("Stop game: Game logic destroyed")
 
 			# TODO: Stop motor control loop.
 
 		else:
 			logging.info("Stop game: No game is running")
 			
-		# Clean up board shim.
+		if keep_standby and self.is_streaming and self.board_shim is not None and self.board_shim.is_prepared():
+			logging.info("Stop game: Board kept streaming in standby")
+			return
+		self.release_board()
+
+	def release_board(self):
+		"""Stop streaming and release the board session."""
 		if self.board_shim is not None:
 			if self.board_shim.is_prepared():
 				self.board_shim.release_session()
 				logging.info('Stop game: Board shim released')
 			self.board_shim = None
+		self.is_streaming = False
 			
+	def get_motor_state(self) -> str:
+		"""Connection state of the motor service."""
+		return self.motor.get_state()
+
 	def quit_game(self):
-		self.queue.put("end")
-		self.queue.close()
-		self.motor_process.join()
+		self.release_board()
+		self.motor.stop()
+		MLClassifier.destroy_all()
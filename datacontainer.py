@@ -1,28 +1,162 @@
 import threading
+import numpy as np
+
+from decimation import DECIMATORS
 
 class DataContainer:
-	"""Container used for dynamic data retrieval from the game thread."""
-	def __init__(self):
+	"""
+	Latest-wins frame mailbox between the game thread and the renderer.
+	The game thread publishes frames, the renderer consumes at most the
+	latest one per rendered frame. Frames replaced before being consumed
+	are counted as dropped.
+
+	Optionally, the container manages a set of preallocated frames (at least
+	three). The writer then fills the frame returned by `acquire`, which is
+	never the latest published frame nor the one held by the renderer
+	(triple buffering), so frames are reused without copies or tearing.
+	"""
+	def __init__(self, slots: list=None):
 		self.data = None
-		self.cond = threading.Condition()
+		self.slots = slots
+		self.latest_slot = None # Slot of the latest published frame.
+		self.held_slot = None # Slot of the frame last consumed by the renderer.
+		self.lock = threading.Lock()
+		self.seq = 0 # Sequence no. of the latest published frame.
+		self.consumed_seq = 0 # Sequence no. of the latest consumed frame.
+		self.consumed = 0
+		self.dropped = 0
 		self.bypass = False
-	
+
+	def acquire(self):
+		"""Get a preallocated frame which is free to be written."""
+		with self.lock:
+			for i, slot in enumerate(self.slots):
+				if i != self.latest_slot and i != self.held_slot:
+					return slot
+
+	def set_width(self, width: int):
+		"""Set the plot width of all preallocated frames."""
+		for slot in self.slots:
+			slot.set_width(width)
+
 	def put(self, data):
-		"""Place data into the container."""
-		with self.cond:
+		"""Publish a frame, replacing any unconsumed frame."""
+		with self.lock:
+			if self.seq != self.consumed_seq:
+				self.dropped += 1
 			self.data = data
-			self.cond.notify()
-	
+			if self.slots is not None:
+				self.latest_slot = next(i for i, slot in enumerate(self.slots) if slot is data)
+			self.seq += 1
+
 	def get(self):
-		"""Retrieve data from the container."""
-		if not self.bypass:
-			with self.cond:
-				self.cond.wait()
-				data = self.data
-		return data
+		"""Retrieve the latest frame, or None if there is no new frame. Never blocks."""
+		if self.bypass:
+			return None
+		with self.lock:
+			if self.seq == self.consumed_seq:
+				return None
+			self.consumed_seq = self.seq
+			self.consumed += 1
+			self.held_slot = self.latest_slot
+			return self.data
+
+	def get_stats(self):
+		"""Frame counters."""
+		with self.lock:
+			return {'published': self.seq, 'consumed': self.consumed, 'dropped': self.dropped}
+
+	def reset(self):
+		"""Discard any pending frame and reset the counters."""
+		with self.lock:
+			self.data = None
+			self.latest_slot = None
+			self.held_slot = None
+			self.seq = 0
+			self.consumed_seq = 0
+			self.consumed = 0
+			self.dropped = 0
 
 	def destroy(self):
 		"""Destroy the container."""
 		self.bypass = True
-		with self.cond:
-			self.cond.notify()
\ No newline at end of file
+		with self.lock:
+			self.data = None
+
+class PlotFrame:
+	"""
+	Preallocated snapshot of the plotted quantities of all players. If a plot
+	width (in pixels) is set, the line series are decimated to the display
+	resolution when the frame is filled.
+	"""
+	def __init__(self, num_players: int=2, num_points: int=0, method: str='minmax'):
+		self.num_players = num_players
+		self.method = method
+		self.width = None
+		self.pending_width = None
+		self.allocate(num_points)
+
+	def allocate(self, num_points: int):
+		"""(Re)allocate the arrays for the given window length."""
+		self.num_points = num_points
+		self.ts_time = np.zeros(num_points)
+		self.timeseries = np.zeros((self.num_players, num_points))
+		self.rel_time = np.zeros((self.num_players, num_points))
+		self.metric = np.zeros((self.num_players, num_points))
+		self.metric_count = [0]*self.num_players
+		self.band_power = np.zeros((self.num_players, 5))
+		self.__create_decimators()
+
+	def set_width(self, width: int):
+		"""Set the plot width in pixels, applied on the next fill. None disables decimation."""
+		self.pending_width = width
+
+	def __create_decimators(self):
+		"""One decimator per player and line series, None if decimation is disabled."""
+		if self.width is None or self.method is None:
+			self.decimators = None
+			return
+		decimator = DECIMATORS[self.method]
+		self.decimators = [(decimator(self.num_points, self.width), decimator(self.num_points, self.width))
+		                   for _ in range(self.num_players)]
+
+	def fill(self, quantities):
+		"""Copy the quantities of the current tick into the frame, without allocation."""
+		num_points = len(quantities[0]['time_series'][0])
+		if num_points != self.num_points:
+			self.allocate(num_points)
+		if self.pending_width != self.width:
+			self.width = self.pending_width
+			self.__create_decimators()
+		for p, player_info in enumerate(quantities):
+			ts_time, timeseries = player_info['time_series']
+			_, rel_time, metric = player_info['focus_metric']
+			n = len(metric)
+			self.ts_time[...] = ts_time
+			self.timeseries[p] = timeseries
+			self.rel_time[p, num_points-n:] = rel_time
+			self.metric[p, num_points-n:] = metric
+			self.metric_count[p] = n
+			self.band_power[p] = player_info['band_power']
+		# Decimate to the display resolution.
+		self.ts_series = [self.__raw_time_series(p) for p in range(self.num_players)]
+		self.metric_series = [self.__raw_focus_metric(p) for p in range(self.num_players)]
+		if self.decimators is not None:
+			for p, (ts_decimator, metric_decimator) in enumerate(self.decimators):
+				self.ts_series[p] = ts_decimator.decimate(*self.ts_series[p])
+				self.metric_series[p] = metric_decimator.decimate(*self.metric_series[p])
+
+	def __raw_time_series(self, player: int):
+		return self.ts_time, self.timeseries[player]
+
+	def __raw_focus_metric(self, player: int):
+		start = self.num_points - self.metric_count[player]
+		return self.rel_time[player, start:], self.metric[player, start:]
+
+	def get_time_series(self, player: int):
+		"""Time axis and (decimated) time series of a player, as contiguous views."""
+		return self.ts_series[player]
+
+	def get_focus_metric(self, player: int):
+		"""Relative time and (decimated) focus metric of a player, as contiguous views."""
+		return self.metric_series[player]
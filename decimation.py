@@ -0,0 +1,108 @@
+import numpy as np
+
+# Series with fewer samples per pixel column are passed through, decimating them
+# costs more than drawing the points saved.
+MIN_SAMPLES_PER_COLUMN = 4
+
+class MinMaxDecimator:
+	"""
+	Display-resolution aware decimation of a line series, keeping the minimum
+	and the maximum sample of every pixel column (in time order), such that
+	spikes and the envelope of the signal are preserved. The newest sample is
+	always kept, such that the right edge of a live plot does not lag. Series
+	with fewer than MIN_SAMPLES_PER_COLUMN samples per pixel column are passed
+	through. All buffers are preallocated, the returned arrays are views into
+	them.
+	"""
+	def __init__(self, capacity: int, width: int):
+		self.capacity = capacity
+		self.width = max(int(width), 1)
+		max_bucket = -(-capacity // self.width)
+		self.padded = np.zeros(capacity + max_bucket)
+		self.offsets = np.arange(self.width)
+		self.imin = np.zeros(self.width, dtype=np.intp)
+		self.imax = np.zeros(self.width, dtype=np.intp)
+		self.first = np.zeros(self.width, dtype=np.intp)
+		self.index = np.zeros(2*self.width, dtype=np.intp)
+		self.x = np.zeros(2*self.width + 1)
+		self.y = np.zeros(2*self.width + 1)
+
+	def decimate(self, x: np.ndarray, y: np.ndarray):
+		"""Decimate the series (x, y) to at most two points per pixel column, plus the newest sample."""
+		n = len(y)
+		if n < MIN_SAMPLES_PER_COLUMN*self.width:
+			return x, y
+		# Split into equally sized buckets, padding the front with the first sample.
+		k = -(-n // self.width) # Samples per bucket.
+		B = -(-n // k) # No. of buckets.
+		pad = B*k - n
+		padded = self.padded[:B*k]
+		padded[:pad] = y[0]
+		padded[pad:] = y
+		buckets = padded.reshape(B, k)
+		imin, imax, first = self.imin[:B], self.imax[:B], self.first[:B]
+		np.argmin(buckets, axis=1, out=imin)
+		np.argmax(buckets, axis=1, out=imax)
+		# Absolute sample indices, ordered in time within each bucket.
+		np.multiply(self.offsets[:B], k, out=first)
+		first -= pad
+		index = self.index[:2*B]
+		np.minimum(imin, imax, out=index[0::2])
+		np.maximum(imin, imax, out=index[1::2])
+		index[0::2] += first
+		index[1::2] += first
+		np.maximum(index, 0, out=index)
+		m = 2*B
+		np.take(x, index, out=self.x[:m])
+		np.take(y, index, out=self.y[:m])
+		if index[-1] != n-1:
+			self.x[m], self.y[m] = x[-1], y[-1]
+			m += 1
+		return self.x[:m], self.y[:m]
+
+class LTTBDecimator:
+	"""
+	Largest-Triangle-Three-Buckets decimation of a line series to two points
+	per pixel column. Preserves the visual shape of smooth signals better
+	than min/max, but is sequential and hence considerably slower, and it
+	allocates temporaries. Passes series through like MinMaxDecimator.
+	"""
+	def __init__(self, capacity: int, width: int):
+		self.capacity = capacity
+		self.width = max(int(width), 1)
+		self.threshold = max(2*self.width, 3)
+		self.x = np.zeros(self.threshold)
+		self.y = np.zeros(self.threshold)
+
+	def decimate(self, x: np.ndarray, y: np.ndarray):
+		"""Decimate the series (x, y) to at most `threshold` points."""
+		n = len(y)
+		if n <= self.threshold or n < MIN_SAMPLES_PER_COLUMN*self.width:
+			return x, y
+		m = self.threshold
+		edges = (np.arange(m-1)*(n-2)/(m-2)).astype(np.intp) + 1
+		edges[-1] = n-1
+		# Average points of all buckets, the last "bucket" is the last sample.
+		counts = np.diff(np.append(edges, n))
+		x_avg = (np.add.reduceat(x[:n], edges)/counts).tolist()
+		y_avg = (np.add.reduceat(y[:n], edges)/counts).tolist()
+		edges = edges.tolist()
+		xs, ys = x.tolist(), y.tolist()
+		self.x[0], self.y[0] = xs[0], ys[0]
+		# The selected point depends on the previous one, hence the sequential loop.
+		a = 0
+		for i in range(m-2):
+			xa, ya = xs[a], ys[a]
+			xc, yc = x_avg[i+1], y_avg[i+1]
+			best = -1.0
+			for j in range(edges[i], edges[i+1]):
+				# Point of the current bucket spanning the largest triangle.
+				area = abs((xa - xc)*(ys[j] - ya) - (xa - xs[j])*(yc - ya))
+				if area > best:
+					best, a_next = area, j
+			a = a_next
+			self.x[i+1], self.y[i+1] = xs[a], ys[a]
+		self.x[-1], self.y[-1] = xs[-1], ys[-1]
+		return self.x, self.y
+
+DECIMATORS = {'minmax': MinMaxDecimator, 'lttb': LTTBDecimator}
@@ -59,7 +59,8 @@ item_id = {
 		"img_swe_welc": dpg.generate_uuid(),
 	},
 	"combos": {
-		"board_id": dpg.generate_uuid()
+		"board_id": dpg.generate_uuid(),
+		"serial_port": dpg.generate_uuid(),
 	},
 	"text": {
 		"title": dpg.generate_uuid(),
@@ -72,6 +73,7 @@ item_id = {
 		'info_game': dpg.generate_uuid(),
 		'p1_status': dpg.generate_uuid(),
 		'p2_status': dpg.generate_uuid(),
+		'motor_status': dpg.generate_uuid(),
 	},
 	"registry": {
 		"enter_key": dpg.generate_uuid(),
@@ -181,6 +183,10 @@ labels = {
 		"eng": "Board ID",
 		"swe": "Board ID",
 	},
+	"sett_serialport": {
+		"eng": "Serial port",
+		"swe": "Serieport",
+	},
 	"settings_ok": {
 		"eng": "OK",
 		"swe": "OK",
@@ -201,6 +207,30 @@ labels = {
 		"eng": "Applying settings...",
 		"swe": "Applicerar inställningar...",
 	},
+	"loading_board": {
+		"eng": "Board prepared...",
+		"swe": "Kortet är förberett...",
+	},
+	"loading_differential": {
+		"eng": "Differential mode set...",
+		"swe": "Differentiellt läge inställt...",
+	},
+	"loading_classifier": {
+		"eng": "Classifier ready...",
+		"swe": "Klassificeraren är redo...",
+	},
+	"loading_motor_connecting": {
+		"eng": "Connecting to the labyrinth...",
+		"swe": "Ansluter till labyrinten...",
+	},
+	"loading_motor_connected": {
+		"eng": "Labyrinth connected...",
+		"swe": "Labyrinten är ansluten...",
+	},
+	"loading_motor_disconnected": {
+		"eng": "Labyrinth not found, retrying...",
+		"swe": "Labyrinten hittades inte, försöker igen...",
+	},
 	"loading_success": {
 		"eng": "Successfully applied settings.",
 		"swe": "Inställningarna har applicerats.",
@@ -225,6 +255,22 @@ labels = {
 		"eng": "Copyright by Alfons Edbom Devall, Alfred Leimar, Elsa Magnusson, Elias Olofsson, Jacob Persson & Jennica Sandberg",
 		"swe": "Copyright av Alfons Edbom Devall, Alfred Leimar, Elsa Magnusson, Elias Olofsson, Jacob Persson & Jennica Sandberg",
 	},
+	"motor_stopped": {
+		"eng": "Labyrinth: Off",
+		"swe": "Labyrint: Av",
+	},
+	"motor_connecting": {
+		"eng": "Labyrinth: Connecting...",
+		"swe": "Labyrint: Ansluter...",
+	},
+	"motor_connected": {
+		"eng": "Labyrinth: Connected",
+		"swe": "Labyrint: Ansluten",
+	},
+	"motor_disconnected": {
+		"eng": "Labyrinth: Reconnecting...",
+		"swe": "Labyrint: Återansluter...",
+	},
 	"status_paused": {
 		"eng": "Stopped",
 		"swe": "Stannad",
@@ -2,6 +2,15 @@ import dearpygui.dearpygui as dpg
 
 fullscreen_is_active = False
 
+# Retained state of the items updated by the render loop: the last applied
+# value and configuration of each item, such that redundant calls are skipped.
+retained_values = {}
+retained_config = {}
+# DPG calls issued and skipped through the retained state, in the current frame.
+frame_calls = 0
+frame_skipped = 0
+call_stats = {'frames': 0, 'calls': 0, 'skipped': 0, 'max_calls': 0, 'last_calls': 0}
+
 def is_viewport_fullscreen():
 	global fullscreen_is_active
 	return fullscreen_is_active
@@ -24,5 +33,58 @@ def toggle_viewport_fullscreen():
 	else: 
 		enter_viewport_fullscreen()
 
+def update_item(item, **kwargs):
+	"""dpg.configure_item, applying only the keywords which differ from the last applied ones."""
+	global frame_calls, frame_skipped
+	config = retained_config.setdefault(item, {})
+	changed = {key: value for key, value in kwargs.items() if key not in config or config[key] != value}
+	if not changed:
+		frame_skipped += 1
+		return
+	config.update(changed)
+	dpg.configure_item(item, **changed)
+	frame_calls += 1
+
+def update_value(item, value):
+	"""dpg.set_value, skipped if a scalar or string value equals the last applied one."""
+	global frame_calls, frame_skipped
+	if isinstance(value, (str, int, float, bool)):
+		if retained_values.get(item, None) == value:
+			frame_skipped += 1
+			return
+		retained_values[item] = value
+	else:
+		# Series data is not compared, always applied.
+		retained_values.pop(item, None)
+	dpg.set_value(item, value)
+	frame_calls += 1
+
+def invalidate_item(item=None):
+	"""Forget the retained state of an item (all items if None), e.g. after modifying it directly."""
+	if item is None:
+		retained_values.clear()
+		retained_config.clear()
+	else:
+		retained_values.pop(item, None)
+		retained_config.pop(item, None)
+
+def begin_frame():
+	"""Start counting the DPG calls of a new frame, accumulating those of the previous frame."""
+	global frame_calls, frame_skipped
+	call_stats['frames'] += 1
+	call_stats['calls'] += frame_calls
+	call_stats['skipped'] += frame_skipped
+	call_stats['max_calls'] = max(call_stats['max_calls'], frame_calls)
+	call_stats['last_calls'] = frame_calls
+	frame_calls = 0
+	frame_skipped = 0
 
+def get_call_stats():
+	"""DPG call counters, with the mean no. of issued calls per frame."""
+	stats = dict(call_stats)
+	stats['mean_calls'] = stats['calls'] / max(stats['frames'], 1)
+	return stats
 
+def reset_call_stats():
+	for key in call_stats:
+		call_stats[key] = 0
@@ -0,0 +1,181 @@
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+from motor import make_command
+
+# Action codes used in the shared frames.
+ACTIONS = [None, "LEFT", "RIGHT", "FORWARD", "BACKWARD"]
+
+class SharedFrameBuffer:
+	"""
+	Double-buffered game frames in shared memory, written by the game worker
+	process and mapped zero-copy by the GUI process.
+
+	The writer fills the inactive slot and then flips the active slot index.
+	Each slot carries a sequence number which is odd while the slot is being
+	written (seqlock). The reader copies the active slot and retries if the
+	sequence number changed meanwhile, i.e. the copy may be torn.
+	"""
+	def __init__(self, num_channels: int, num_points: int, num_players: int=2, name: str=None, create: bool=False):
+		self.num_channels = num_channels
+		self.num_points = num_points
+		self.num_players = num_players
+		# Layout of a single slot.
+		P, N = num_players, num_points
+		self.fields = [
+			('data', (num_channels, N), np.float64),
+			('ts_time', (N,), np.float64),
+			('band_power', (P, 5), np.float64),
+			('metric_time', (P, N), np.float64),
+			('metric_rel_time', (P, N), np.float64),
+			('metric', (P, N), np.float32),
+			('metric_count', (P,), np.int64),
+			('action_count', (P,), np.int64),
+			('last_action', (P,), np.int64),
+		]
+		header_size = 8*4 # active slot, seq slot 0, seq slot 1, no. of published frames
+		slot_size = sum(int(np.prod(shape))*np.dtype(dtype).itemsize for _, shape, dtype in self.fields)
+		self.shm = shared_memory.SharedMemory(name=name, create=create, size=header_size + 2*slot_size)
+		self.name = self.shm.name
+		self.header = np.ndarray((4,), dtype=np.int64, buffer=self.shm.buf)
+		if create:
+			self.header[:] = 0
+		# Map the fields of both slots.
+		self.slots = []
+		offset = header_size
+		for _ in range(2):
+			slot = {}
+			for field, shape, dtype in self.fields:
+				slot[field] = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+				offset += int(np.prod(shape))*np.dtype(dtype).itemsize
+			self.slots.append(slot)
+		if create:
+			for slot in self.slots:
+				for array in slot.values():
+					array[...] = 0
+		self.last_read = 0 # Reader side: no. of published frames at the last read.
+		self.local = None # Reader side: copy of the latest frame, allocated on the first read.
+
+	def publish(self, quantities, actions, data: np.ndarray):
+		"""Write a game frame into the inactive slot and make it the active one."""
+		i = 1 - int(self.header[0])
+		slot = self.slots[i]
+		self.header[1+i] += 1 # Odd: slot is being written.
+		slot['data'][...] = data
+		for p, player_info in enumerate(quantities):
+			ts_time, _ = player_info['time_series']
+			abs_time, rel_time, metric = player_info['focus_metric']
+			n = len(metric)
+			slot['ts_time'][...] = ts_time
+			slot['band_power'][p] = player_info['band_power']
+			slot['metric_time'][p, self.num_points-n:] = abs_time
+			slot['metric_rel_time'][p, self.num_points-n:] = rel_time
+			slot['metric'][p, self.num_points-n:] = metric
+			slot['metric_count'][p] = n
+		# Action counters are cumulative, such that skipped frames do not lose actions.
+		previous = self.slots[1-i]
+		for p, action in enumerate(actions):
+			slot['action_count'][p] = previous['action_count'][p] + (action is not None)
+			slot['last_action'][p] = ACTIONS.index(action) if action is not None else previous['last_action'][p]
+		self.header[1+i] += 1 # Even: slot is complete.
+		self.header[0] = i
+		self.header[3] += 1
+
+	def read(self, active_channels: list[int], retries: int=3):
+		"""
+		Copy the latest frame out of the shared memory. Returns (seq, frame),
+		or None if no new frame has been published or no consistent copy was
+		made within the retries. The frame stays valid until the next read.
+		"""
+		published = int(self.header[3])
+		if published == 0 or published == self.last_read:
+			return None
+		if self.local is None:
+			self.local = {field: np.zeros(shape, dtype=dtype) for field, shape, dtype in self.fields}
+		slot = self.local
+		for _ in range(retries):
+			i = int(self.header[0])
+			seq = int(self.header[1+i])
+			if seq % 2 == 1:
+				continue
+			for field, array in self.slots[i].items():
+				np.copyto(slot[field], array)
+			# The writer reuses the slot every second publish, the copy is torn if it did meanwhile.
+			if int(self.header[1+i]) == seq:
+				break
+		else:
+			return None
+		quantities = []
+		for p, channel in enumerate(active_channels):
+			n = int(slot['metric_count'][p])
+			quantities.append({
+				'time_series': (slot['ts_time'], slot['data'][channel]),
+				'band_power': slot['band_power'][p],
+				'focus_metric': (slot['metric_time'][p, self.num_points-n:],
+				                 slot['metric_rel_time'][p, self.num_points-n:],
+				                 slot['metric'][p, self.num_points-n:]),
+			})
+		frame = {
+			'quantities': tuple(quantities),
+			'action_count': slot['action_count'],
+			'last_action': slot['last_action'],
+			'data': slot['data'],
+		}
+		self.last_read = published
+		return seq, frame
+
+	def close(self):
+		self.shm.close()
+
+	def unlink(self):
+		self.shm.unlink()
+
+def game_worker(board_id: int, params: BrainFlowInputParams, active_channels: list[int], streamer_params: str,
+                shm_name: str, stop_event, action_queue: multiprocessing.Queue, init_data=None, old_quantities=None):
+	"""Worker process running the game logic, publishing every tick into shared memory."""
+	# Deferred import, braingame imports this module.
+	import braingame
+	logging.basicConfig(level=logging.INFO)
+	board_shim = BoardShim(board_id, params)
+	frames = None
+	try:
+		board_shim.prepare_session()
+		if board_id == BoardIds.CYTON_BOARD:
+			braingame.set_differential_mode(board_shim, active_channels)
+		board_shim.start_stream(450000, streamer_params)
+		gamelogic = braingame.GameLogic(board_shim, active_channels, init_data, old_quantities)
+		frames = SharedFrameBuffer(gamelogic.num_channels, gamelogic.num_points, name=shm_name)
+		scheduler = braingame.TickScheduler(board_shim, gamelogic.sampling_rate,
+		                                    hop_samples=braingame.TICK_HOP_SAMPLES, hop_time=braingame.TICK_HOP_TIME)
+		logging.info("Game worker: Game logic started")
+		while not stop_event.is_set():
+			if not scheduler.wait(lambda: not stop_event.is_set()):
+				break
+			quantities, actions, data = gamelogic.update()
+			scheduler.done()
+			frames.publish(quantities, actions, data)
+			# Send actions to the motor logic.
+			for action in actions:
+				if action is not None and action_queue is not None:
+					action_queue.put(make_command(action))
+		logging.info(f"Game worker: Tick statistics: {scheduler.get_stats()}")
+		gamelogic.destroy()
+	except BaseException:
+		logging.warning('Exception', exc_info=True)
+	finally:
+		if frames is not None:
+			frames.close()
+		if board_shim.is_prepared():
+			board_shim.release_session()
+		logging.info("Game worker: Stopped")
+
+def copy_quantities(quantities):
+	"""Deep copy of the player quantities, e.g. to detach them from the shared memory."""
+	copied = []
+	for player_info in quantities:
+		copied.append({key: tuple(np.array(x) for x in value) if isinstance(value, tuple) else np.array(value)
+		               for key, value in player_info.items()})
+	return tuple(copied)
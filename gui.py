@@ -1,6 +1,8 @@
 import os
 import time
 import logging
+import math
+import queue
 import threading
 import numpy as np
 
@@ -8,8 +10,10 @@ import dearpygui.dearpygui as dpg
 from brainflow.board_shim import BoardIds
 
 import braingame
+from datacontainer import DataContainer, PlotFrame
+from animation import SpriteSheet, StatusIcon
 from definitions import item_id, labels
-from util import FPS, serial_ports
+from util import FPS, port_scanner
 from dpg_util import *
 import fonts
 
@@ -19,6 +23,8 @@ toggle_state = True # Initialization
 basepath = "resources" # Folder containing images.
 images = ["sweden.png", "united_kingdom.png"] # Flags
 lang = "eng" # Default language. Valid options: "swe", "eng".
+plot_decimation = "minmax" # Decimation of the line series to the plot width. Valid options: "minmax", "lttb", None.
+loading_failure_time = 2.5 # Seconds the failure message stays on the loading screen.
 
 class GUI:
 	def __init__(self) -> None:
@@ -26,18 +32,30 @@ class GUI:
 		# Create an instance of the main game.
 		self.braingame = braingame.BrainGameInterface()
 		self.braingame_is_running = False
+		self.game_ended = False # Set by the game thread if the game ended by itself.
 		self.settings_are_applied = False
 		self.have_shown_help_dialogue = False
 		self.welcome_screen_visible = True
 		self.init_time = time.time()
-		self.start_time = 0
-		self.stop_time = 1
-		self.p1_time = 0
-		self.p2_time = 0
-		self.flags = [[True, False, False], [True, False, False]]
-		self.p1_last_action = ""
-		self.p2_last_action = ""
+		# Animated status icons of the two players, sharing a 3 by 28 spritesheet.
+		self.spritesheet = SpriteSheet(3, 28)
+		self.icons = [StatusIcon(self.spritesheet), StatusIcon(self.spritesheet)]
+		self.icon_ids = [(item_id['images']['p1_icon'], item_id['text']['p1_status']),
+		                 (item_id['images']['p2_icon'], item_id['text']['p2_status'])]
 		self.fresh_start = True
+		# Background job applying the settings, and its progress events.
+		self.settings_job = None
+		self.settings_progress = queue.Queue()
+		self.loading_failure_deadline = None # Time to close the loading screen after a failure.
+		self.reopen_settings = False # Show the settings menu at the next rendered frame.
+		# Serial ports are discovered in the background, the list is updated on hot-plug.
+		# The ports of the board and the motors are never probed.
+		self.serial_ports = None
+		port_scanner.set_excluded([self.braingame.params.serial_port, self.braingame.motor.usb_port])
+		port_scanner.add_listener(self.callback_serial_ports_changed)
+		port_scanner.start_watching()
+		# Latest-wins mailbox for frames from the game thread to the renderer, triple buffered.
+		self.frames = DataContainer(slots=[PlotFrame(method=plot_decimation) for _ in range(3)])
 		
 		# Create and initialize all GUI windows.
 		self.__create_welcome_window()
@@ -119,6 +137,8 @@ class GUI:
 						item_id['buttons']["img_eng_main"] = add_and_load_image_button(os.path.join(basepath, images[1]), callback=self.set_english)
 					# Settings button.
 					dpg.add_button(label=labels['settings_btn'][lang], width=btn_width, height=btn_h2, tag=item_id['buttons']['settings'], callback=self.callback_show_settings_menu)
+					# Connection state of the labyrinth motors.
+					dpg.add_text(labels['motor_stopped'][lang], tag=item_id['text']['motor_status'])
 				# Set fonts.
 				dpg.bind_item_font(item_id['text']['title_game'], fonts.large_bold)
 				dpg.bind_item_font(item_id['text']['info_game'], fonts.intermediate_font)
@@ -234,8 +254,9 @@ class GUI:
 		with dpg.texture_registry():
 			dpg.add_static_texture(width, height, data, tag=item_id['textures']['spritesheet'])
 		with dpg.drawlist(tag=item_id['drawlist'], width=100, height=100):
-			dpg.draw_image(item_id['textures']['spritesheet'], (0, 0), (100, 100), uv_min=(13/28, 0), uv_max=(14/28, 1/3), tag=item_id['images']['p1_icon'], show=True)
-			dpg.draw_image(item_id['textures']['spritesheet'], (0, 0), (100, 100), uv_min=(13/28, 0), uv_max=(14/28, 1/3), tag=item_id['images']['p2_icon'], show=True)
+			for icon, (image_id, _) in zip(self.icons, self.icon_ids):
+				uv_min, uv_max = self.spritesheet.get_uv(*icon.frame)
+				dpg.draw_image(item_id['textures']['spritesheet'], (0, 0), (100, 100), uv_min=uv_min, uv_max=uv_max, tag=image_id, show=True)
 		
 
 	def __create_loading_screen(self):
@@ -261,12 +282,14 @@ class GUI:
 		# Contains the last settings which was successfully applied.
 		self.last_working_settings = None
 		# Create the settings window.
-		h, w = 150, 450
+		h, w = 180, 450
 		with dpg.window(tag=item_id['windows']['settings_window'], label=labels['settings_title'][lang], height=h, width=w, 
 		                modal=True, show=False, no_close=True, no_move=True, no_resize=True, no_collapse=True):
 			# Create drop-down menu for Board-ID selector:
 			all_boards = BoardIds._member_names_
 			dpg.add_combo(all_boards, label=labels['sett_boardid'][lang], default_value=all_boards[2], tag=item_id['combos']['board_id'])
+			# Drop-down menu for the serial port, filled from the cached port scan.
+			dpg.add_combo(port_scanner.get_ports(), label=labels['sett_serialport'][lang], default_value=self.braingame.params.serial_port, tag=item_id['combos']['serial_port'])
 
 			# Create bottom row of buttons: OK, Reset & Cancel.
 			dpg.add_spacer(height=10)
@@ -287,95 +310,67 @@ class GUI:
 
 	def callback_render_frame(self):
 		"""Callback function executed at every rendered frame."""
+		begin_frame()
+		# Progress of the settings being applied.
+		self.__update_loading_screen()
+
+		# Clean up after a game which ended without the stop button.
+		if self.game_ended:
+			self.game_ended = False
+			self.callback_stop_game()
+
+		# Apply a changed list of serial ports to the settings menu.
+		serial_ports = self.serial_ports
+		if serial_ports is not None:
+			self.serial_ports = None
+			update_item(item_id['combos']['serial_port'], items=serial_ports)
 		if self.welcome_screen_visible: 
 			# Make "enter-key" phrase pulsate at the welcome screen.
 			t = time.time() - self.init_time
-			opacity = int(128*np.sin(3*t) + 128) # In range [0, 256)
-			dpg.configure_item(item_id['text']['enter_key'], color=(255, 255, 255, opacity))
+			opacity = int(128*math.sin(3*t) + 128) # In range [0, 256)
+			update_item(item_id['text']['enter_key'], color=(255, 255, 255, opacity))
 		else:
-			# Helper functions related to the animation of the two status icons.
-			def softstep(x: float, alpha: float=1):
-				return np.maximum(0, np.minimum(alpha*x, 1))
-
-			def stop_animation(dt: float, duration: float=0.3, num_frames: int=28):
-				idx = np.floor(0.5*softstep(dt, alpha=1/duration)*num_frames)
-				return (idx/num_frames, 0), ((idx+1)/num_frames, 1/3)
-			
-			def start_animation(dt: float, duration: float=0.3, num_frames: int=28):
-				idx = np.floor(0.5*(1-softstep(dt, alpha=1/duration))*num_frames)
-				return (idx/num_frames, 0), ((idx+1)/num_frames, 1/3)
+			# Update the plots with the latest frame from the game thread, if any.
+			frame = self.frames.get()
+			if frame is not None:
+				self.__update_plots(frame)
 
-			def checkmark_animation(dt: float, duration: float=1.25, num_frames:int=28):
-				idx = np.floor(softstep(dt, alpha=1/duration)*num_frames)
-				return idx/num_frames, (idx+1)/num_frames
-			
-			def cogwheel_animation(dt: float, duration: float=2.5, num_frames: int=28):
-				idx = np.floor(softstep(dt, alpha=1/duration)*2*num_frames) % num_frames
-				return idx/num_frames, (idx+1)/num_frames
-
-			def action_animation(dt: float, player: int, status_id: str, status_dir: str):
-				checkmark_duration = 1.25 # in seconds
-				cogwheel_duration = 2 # in seconds
-				if dt < checkmark_duration:
-					# Play the checkmark animation
-					u_min, u_max = checkmark_animation(dt, duration=checkmark_duration)
-					v_min, v_max = 1/3, 2/3
-					if self.flags[player][0]:
-						self.flags[player][0] = False
-						self.flags[player][1] = True
-						dpg.configure_item(item_id['text'][status_id], default_value=labels['status_detected'][lang])
-				elif dt-checkmark_duration < cogwheel_duration:
-					# Play cogwheel animation
-					u_min, u_max = cogwheel_animation(dt-checkmark_duration, duration=cogwheel_duration)
-					v_min, v_max = 2/3, 1
-					if self.flags[player][1]:
-						self.flags[player][1] = False
-						self.flags[player][2] = True 
-						dpg.configure_item(item_id['text'][status_id], default_value=labels[status_dir][lang])
-				else:
-					# Display the static "play" icon
-					u_min, u_max = 0, 1/28
-					v_min, v_max = 0, 1/3
-					if self.flags[player][2]:
-						self.flags[player][2] = False
-						self.flags[player][0] = True
-						dpg.configure_item(item_id['text'][status_id], default_value=labels['status_wait'][lang])
-				return (u_min, v_min), (u_max, v_max)
+			# Connection state of the labyrinth motors.
+			motor_state = self.braingame.get_motor_state()
+			update_item(item_id['text']['motor_status'], default_value=labels['motor_' + motor_state][lang])
 
+			# Advance the status icon animations, only reconfiguring changed items.
 			now = time.time()
-			time_newest_event = np.max([self.start_time, self.stop_time, self.p1_time, self.p2_time])
-			if now-time_newest_event < 15:
-				if self.stop_time > np.max([self.start_time, self.p1_time, self.p2_time]):
-					# Stop animation
-					uv_min_p1, uv_max_p1 = stop_animation(now-self.stop_time)
-					uv_min_p2, uv_max_p2 = uv_min_p1, uv_max_p1
-				elif self.start_time > np.max([self.p1_time, self.p2_time]):
-					# Start animation
-					uv_min_p1, uv_max_p1 = start_animation(now-self.start_time)
-					uv_min_p2, uv_max_p2 = uv_min_p1, uv_max_p1
-				else:
-					# Action animation player 1 & 2
-					uv_min_p1, uv_max_p1 = action_animation(now-self.p1_time, player=0, status_id="p1_status", status_dir=self.p1_last_action)
-					uv_min_p2, uv_max_p2 = action_animation(now-self.p2_time, player=1, status_id="p2_status", status_dir=self.p2_last_action)
-
-				dpg.configure_item(item_id['images']['p1_icon'], uv_min=uv_min_p1, uv_max=uv_max_p1)
-				dpg.configure_item(item_id['images']['p2_icon'], uv_min=uv_min_p2, uv_max=uv_max_p2)
+			for icon, (image_id, status_id) in zip(self.icons, self.icon_ids):
+				uv, label = icon.update(now)
+				if uv is not None:
+					update_item(image_id, uv_min=uv[0], uv_max=uv[1])
+				if label is not None:
+					update_item(status_id, default_value=labels[label][lang])
+
+	def callback_serial_ports_changed(self, ports: list):
+		"""Called by the port scanner thread, the ports are applied at the next rendered frame."""
+		self.serial_ports = ports
 
 	def trigger_start_animation(self):
 		"""
 		Trigger the "start" animation sequence for the two status icons.
 		"""
-		self.start_time = time.time()
-		dpg.configure_item(item_id['text']['p1_status'], default_value=labels['status_wait'][lang])
-		dpg.configure_item(item_id['text']['p2_status'], default_value=labels['status_wait'][lang])
+		now = time.time()
+		for icon in self.icons:
+			icon.trigger_start(now)
+		update_item(item_id['text']['p1_status'], default_value=labels['status_wait'][lang])
+		update_item(item_id['text']['p2_status'], default_value=labels['status_wait'][lang])
 
 	def trigger_stop_animation(self):
 		"""
 		Trigger the "stop" animation sequence for the two status icons. 
 		"""
-		self.stop_time = time.time()
-		dpg.configure_item(item_id['text']['p1_status'], default_value=labels['status_paused'][lang])
-		dpg.configure_item(item_id['text']['p2_status'], default_value=labels['status_paused'][lang])
+		now = time.time()
+		for icon in self.icons:
+			icon.trigger_stop(now)
+		update_item(item_id['text']['p1_status'], default_value=labels['status_paused'][lang])
+		update_item(item_id['text']['p2_status'], default_value=labels['status_paused'][lang])
 
 	def trigger_action_animation(self, player: int, direction: int):
 		"""
@@ -385,11 +380,9 @@ class GUI:
 		p1_actions = ["status_left", "status_right"]
 		p2_actions = ["status_forward", "status_backward"]
 		if player == 0:
-			self.p1_last_action = p1_actions[direction]
-			self.p1_time = time.time()
+			self.icons[0].trigger_action(time.time(), p1_actions[direction])
 		elif player == 1:
-			self.p2_last_action = p2_actions[direction]
-			self.p2_time = time.time()
+			self.icons[1].trigger_action(time.time(), p2_actions[direction])
 		else:
 			raise BaseException
 
@@ -464,9 +457,11 @@ class GUI:
 		board_name = dpg.get_value(item_id['combos']['board_id'])
 		board_id = BoardIds[board_name].value
 		self.braingame.callback_set_board_id(board_id)
+		serial_port = dpg.get_value(item_id['combos']['serial_port'])
+		self.braingame.callback_set_serial_port(serial_port)
 
 		# Collect all settings sent to the board.
-		settings = [board_id]
+		settings = [board_id, serial_port]
 		return settings
 
 	def callback_settings_reset(self):
@@ -477,13 +472,14 @@ class GUI:
 		successfully were applied.
 		"""
 		if self.last_working_settings is None:
-			settings = [0, ] # Defaults: [Synthetic board, ...]
+			settings = [0, ""] # Defaults: [Synthetic board, no serial port]
 		else:
 			settings = self.last_working_settings
 		
 		# Set Board-ID in GUI drop down menu.
 		board_id = settings[0]
 		dpg.set_value(item_id['combos']['board_id'], value=BoardIds(board_id).name)
+		dpg.set_value(item_id['combos']['serial_port'], value=settings[1])
 		
 	def callback_settings_cancel(self):
 		"""Callback function to discard new settings and close the settings window."""
@@ -497,6 +493,7 @@ class GUI:
 	def callback_show_settings_menu(self):
 		"""Callback function to enter the settings menu."""
 		self.callback_stop_game() # Stop any game currently running.
+		port_scanner.refresh() # Update the serial ports in the background.
 		dpg.split_frame() # Guarantee next lines will be rendered in a new frame.
 		dpg.configure_item(item_id['windows']['settings_window'], show=True) # Show the window.
 		dpg.configure_item(item_id['registry']['game_key_binds'], show=False) # Deactivate game key-binds.
@@ -504,6 +501,7 @@ class GUI:
 	def callback_show_help_dialogue(self):
 		"""Callback function to enter the help dialogue."""
 		self.callback_stop_game() # Stop any game currently running.
+		port_scanner.refresh() # Update the serial ports in the background.
 		dpg.split_frame() # Guarantee next lines will be rendered in a new frame.
 		dpg.configure_item(item_id['windows']['help_dialogue'], show=True) # Show the window.
 		dpg.configure_item(item_id['registry']['game_key_binds'], show=False) # Deactivate game key-binds.
@@ -517,8 +515,25 @@ class GUI:
 	def callback_settings_ok(self):
 		"""
 		Callback function for the "OK" button in the settings menu. 
-		Tries to apply the current selection of settings when called.
+		Tries to apply the current selection of settings in a background job,
+		the loading screen shows the progress of the job.
 		"""
+		if (self.settings_job is not None and self.settings_job.is_alive()) or self.loading_failure_deadline is not None:
+			return # Settings are already being applied, or the failure is being shown.
+
+		# Hide the settings window and show the loading screen.
+		dpg.configure_item(item_id['windows']['settings_window'], show=False) # Hide settings
+		dpg.split_frame() # Guarantee that the following lines are rendered in another frame. (Only one modal window can be active at any time.)
+		dpg.configure_item(item_id['windows']['loading_screen'], show=True) # Show loading screen.
+		
+		# Propagate settings from the GUI to the boardshim, and let the boardshim
+		# attempt to apply the settings in the background.
+		settings_candidate = self.propagate_settings()
+		self.settings_job = threading.Thread(target=self.__apply_settings_job, args=(settings_candidate,), daemon=True)
+		self.settings_job.start()
+
+	def __apply_settings_job(self, settings_candidate: list):
+		"""Apply the settings, posting the progress to the loading screen, and finish when done."""
 		# Define helper function.
 		def __enable_cancel_button():
 			"""Enables the functionality of the "CANCEL" button of the settings menu."""
@@ -530,53 +545,70 @@ class GUI:
 			dpg.configure_item(item_id['buttons']['cancel'], enabled=False) # disable button
 			dpg.bind_item_theme(item_id['buttons']['cancel'], item_id['theme']['disabled']) # apply grayed-out theme
 
-		# Hide the settings window and show the loading screen.
-		dpg.configure_item(item_id['windows']['settings_window'], show=False) # Hide settings
-		dpg.split_frame() # Guarantee that the following lines are rendered in another frame. (Only one modal window can be active at any time.)
-		dpg.configure_item(item_id['windows']['loading_screen'], show=True) # Show loading screen.
-		
-		# Propagate settings from the GUI to the boardshim. Let the boardshim attempt
-		# to apply the settings and retrieve the status.
-		settings_candidate = self.propagate_settings()
-		status = self.braingame.callback_apply_settings()
+		start = time.perf_counter()
+		# Keep the port scanner off the serial ports while the board connects.
+		port_scanner.set_excluded([settings_candidate[1], self.braingame.motor.usb_port])
+		port_scanner.pause()
+		status = self.braingame.callback_apply_settings(progress=self.settings_progress.put)
+		port_scanner.resume()
+		logging.info(f"GUI: Settings applied in {time.perf_counter() - start:.2f} s, status: {status}")
 		if status:
 			# Settings were loaded successfully.
-			dpg.configure_item(item_id['text']['loading'], default_value=labels['loading_success'][lang])
+			self.settings_progress.put("success")
 			if not self.settings_are_applied:
 				__enable_cancel_button()
 				self.settings_are_applied = True
 			self.last_working_settings = settings_candidate # Save working settings.
 			self.fresh_start = True # Start game fresh, not from old data
 		else:
-			# Failure occured while attempting to load settings.
-			dpg.configure_item(item_id['text']['loading'], default_value=labels['loading_failure'][lang], pos=(95, 25))
+			# Failure occured while attempting to load settings. The render loop leaves
+			# the message on screen for a moment, and returns to the settings menu.
 			if self.settings_are_applied:
 				__disable_cancel_button()
 				self.settings_are_applied = False
+			self.settings_progress.put("failure")
 			# TODO: MAKE SURE TO HANDLE EVENTUAL ERRORS
+			return
 
-		# Freeze loading animation and wait a few seconds.
-		dpg.configure_item(item_id['indicator']['settings_loading'], speed=0)
-		time.sleep(2.5)
+		# Hide the loading screen and return to the main game screen.
+		dpg.split_frame() # Let the render loop consume the remaining progress events.
+		self.__reset_loading_screen()
+		# Reactivate key-binds for main game screen:
+		dpg.configure_item(item_id['registry']['game_key_binds'], show=True)
+		# If this settings menu occured during initial setup, 
+		# show the help dialogue on the way out. 
+		if not self.have_shown_help_dialogue:
+			self.callback_show_help_dialogue()
 
-		# Hide the loading screen and reset it to default values.
+	def __reset_loading_screen(self):
+		"""Hide the loading screen and reset it to default values."""
 		dpg.configure_item(item_id['windows']['loading_screen'], show=False) 
 		dpg.configure_item(item_id['indicator']['settings_loading'], speed=1)
-		dpg.configure_item(item_id['text']['loading'], default_value=labels['loading_applying'][lang], pos=(95, 37))
+		update_item(item_id['text']['loading'], default_value=labels['loading_applying'][lang], pos=(95, 37))
 
-		# If successful, return the main game screen. Else return to the settings menu.
-		if status:
-			# Reactivate key-binds for main game screen:
-			dpg.configure_item(item_id['registry']['game_key_binds'], show=True)
-			# If this settings menu occured during initial setup, 
-			# show the help dialogue on the way out. 
-			if not self.have_shown_help_dialogue:
-				self.callback_show_help_dialogue()
-		else:
-			# Show the settings menu.
-			dpg.split_frame() # Guarantee following lines will be rendered in a new frame.
+	def __update_loading_screen(self):
+		"""
+		Show the latest progress event of the settings job on the loading screen. 
+		After a failure, return to the settings menu once the message has been shown.
+		"""
+		if self.reopen_settings:
+			# The loading screen was hidden in the previous frame, only one modal window can be active at any time.
+			self.reopen_settings = False
 			dpg.configure_item(item_id['windows']['settings_window'], show=True)
-
+		if self.loading_failure_deadline is not None and time.perf_counter() >= self.loading_failure_deadline:
+			self.loading_failure_deadline = None
+			self.__reset_loading_screen()
+			self.reopen_settings = True
+		stage = None
+		while not self.settings_progress.empty():
+			stage = self.settings_progress.get_nowait()
+		if stage == "failure":
+			# Freeze the loading animation while the message is shown.
+			update_item(item_id['text']['loading'], default_value=labels['loading_failure'][lang], pos=(95, 25))
+			dpg.configure_item(item_id['indicator']['settings_loading'], speed=0)
+			self.loading_failure_deadline = time.perf_counter() + loading_failure_time
+		elif stage is not None:
+			update_item(item_id['text']['loading'], default_value=labels['loading_' + stage][lang])
 
 	def window_resize(self):
 		"""Callback on window resize."""
@@ -591,10 +623,12 @@ class GUI:
 		for i, plot in enumerate(item_id['plots'].values()):
 			pos = (plt_w*xpos[i], plt_h*ypos[i])
 			dpg.configure_item(plot, height=plt_h, width=plt_w, pos=pos)
+		self.frames.set_width(int(plt_w))
 
 		# Position of flag-buttons and settings-button.
 		dpg.configure_item(item_id['buttons']["img_swe_main"], pos=(8, h-124))
 		dpg.configure_item(item_id['buttons']['settings'], pos=(8, h-60))
+		dpg.configure_item(item_id['text']['motor_status'], pos=(8, h-150))
 		
 		# Position and scaling of the animated icons.
 		status_h, status_w = int(h-3*plt_h+24), int(2*plt_w) # Size of entire bottom "stripe" area for status indicators
@@ -699,7 +733,7 @@ class GUI:
 		# Welcome screen
 		dpg.configure_item(item_id['text']['title'], default_value=labels['welcome_title'][lang])
 		dpg.configure_item(item_id['text']['tagline'], default_value=labels['welcome_tagline'][lang])
-		dpg.configure_item(item_id['text']['enter_key'], default_value=labels['welcome_enter'][lang])
+		update_item(item_id['text']['enter_key'], default_value=labels['welcome_enter'][lang])
 		dpg.configure_item(item_id['text']['copyright'], default_value=labels['welcome_copyright'][lang])
 
 		# Plots - Time series
@@ -726,11 +760,11 @@ class GUI:
 
 		# Status text
 		if self.braingame_is_running:
-			dpg.configure_item(item_id['text']['p1_status'], default_value=labels['status_wait'][lang])
-			dpg.configure_item(item_id['text']['p2_status'], default_value=labels['status_wait'][lang])
+			update_item(item_id['text']['p1_status'], default_value=labels['status_wait'][lang])
+			update_item(item_id['text']['p2_status'], default_value=labels['status_wait'][lang])
 		else:
-			dpg.configure_item(item_id['text']['p1_status'], default_value=labels['status_paused'][lang])
-			dpg.configure_item(item_id['text']['p2_status'], default_value=labels['status_paused'][lang])
+			update_item(item_id['text']['p1_status'], default_value=labels['status_paused'][lang])
+			update_item(item_id['text']['p2_status'], default_value=labels['status_paused'][lang])
 
 		# Help dialogue
 		dpg.configure_item(item_id['windows']['help_dialogue'], label=labels['help_title'][lang])
@@ -740,12 +774,13 @@ class GUI:
 		# Settings window
 		dpg.configure_item(item_id['windows']['settings_window'], label=labels['settings_title'][lang])
 		dpg.configure_item(item_id['combos']['board_id'], label=labels['sett_boardid'][lang])
+		dpg.configure_item(item_id['combos']['serial_port'], label=labels['sett_serialport'][lang])
 		dpg.configure_item(item_id['buttons']['ok'], label=labels['settings_ok'][lang])
 		dpg.configure_item(item_id['buttons']['reset'], label=labels['settings_reset'][lang])
 		dpg.configure_item(item_id['buttons']['cancel'], label=labels['settings_cancel'][lang])
 
 		# Loading screen
-		dpg.configure_item(item_id['text']['loading'], default_value=labels['loading_applying'][lang])
+		update_item(item_id['text']['loading'], default_value=labels['loading_applying'][lang])
 
 	#----------------------------------------------------------------------
 	#----------------------------------------------------------------------
@@ -765,11 +800,14 @@ class GUI:
 		if not self.braingame_is_running:
 			try:
 				logging.info("GUI: Starting game")
+				port_scanner.pause() # No port probing during a game.
 				# Start the main game.
 				self.braingame.start_game(fresh_start=self.fresh_start)
 				self.fresh_start = False
 				# Set flag & start the gui plotting thread.
 				self.braingame_is_running = True
+				self.frames.reset()
+				reset_call_stats()
 				self.thread = threading.Thread(target=self.__gui_loop, daemon=False)
 				self.thread.start()
 
@@ -787,17 +825,27 @@ class GUI:
 				logging.warning('Exception', exc_info=True)
 				self.braingame_is_running = False
 				self.callback_stop_game()
+				port_scanner.resume()
 
 		else:
 			logging.info("GUI: callback_start_game: Game is already running")
 
 	def __gui_loop(self):
-		"""Main thread function for updating the GUI plots during a game."""
+		"""
+		Main thread function for the game loop during a game. Frames are published to
+		the renderer, which updates the plots at most once per rendered frame.
+		"""
 		#fps_timer = FPS()
 		while self.braingame_is_running:
-			# Increment game logic, get data and update graphs.
+			# Increment game logic, publish a snapshot of the data for plotting.
 			quantities, actions, data  = self.braingame.update_game()
-			self.__update_plots((quantities, actions))
+			if not self.braingame.game_is_running:
+				# The game ended by itself, e.g. the game worker died. Stopped at the next rendered frame.
+				self.game_ended = True
+				break
+			frame = self.frames.acquire()
+			frame.fill(quantities)
+			self.frames.put(frame)
 			# Trigger action animations of status icons
 			self.trigger_action(actions)
 			# Print fps counter
@@ -811,7 +859,10 @@ class GUI:
 			logging.info("GUI: Stopping game")
 			self.braingame_is_running = False
 			self.thread.join()
+			logging.info(f"GUI: Frame statistics: {self.frames.get_stats()}")
+			logging.info(f"GUI: DPG call statistics: {get_call_stats()}")
 			self.braingame.stop_game()
+			port_scanner.resume()
 			#----
 			# Set theme of start/stop button
 			dpg.configure_item(item_id['buttons']['start_stop'], label=labels['start_btn'][lang])
@@ -827,28 +878,20 @@ class GUI:
 	def callback_quit_program(self):
 		self.callback_stop_game()
 		self.braingame.quit_game()
+		port_scanner.stop()
 
-	def __update_plots(self, data):
-			(player1, player2), actions = data
-			time1, timeseries1 = player1['time_series']
-			time2, timeseries2 = player2['time_series']
-			_, rel_time1, metric1 = player1['focus_metric']
-			_, rel_time2, metric2 = player2['focus_metric']
-
-			band_power1 = player1['band_power']
-			band_power2 = player2['band_power']
-
-			#print("Actions: " + ' '.join(actions) + f"  {metric1[-1]:.5f} {metric2[-1]:.5f}", end='\r')
-			dpg.set_value(item_id['line_series']['timeseries1'], [list(time1), list(timeseries1)])
-			dpg.set_value(item_id['line_series']['timeseries2'], [list(time2), list(timeseries2)])
-			dpg.set_value(item_id['line_series']['metric1'], [list(rel_time1), list(metric1)])
-			dpg.set_value(item_id['line_series']['metric2'], [list(rel_time2), list(metric2)])
+	def __update_plots(self, frame: PlotFrame):
+			"""Update all graphs, the line series are passed to Dear PyGui as NumPy buffers."""
+			update_value(item_id['line_series']['timeseries1'], frame.get_time_series(0))
+			update_value(item_id['line_series']['timeseries2'], frame.get_time_series(1))
+			update_value(item_id['line_series']['metric1'], frame.get_focus_metric(0))
+			update_value(item_id['line_series']['metric2'], frame.get_focus_metric(1))
 
 			# Update bar graphs with power band data.
-			for i, (xpos, yval) in enumerate(zip(range(5), band_power1)):
-				dpg.set_value(item_id["bar1_series"][i], ([xpos],[yval]))
-			for i, (xpos, yval) in enumerate(zip(range(5), band_power2)):
-				dpg.set_value(item_id["bar2_series"][i], ([xpos],[yval]))
+			for i, yval in enumerate(frame.band_power[0].tolist()):
+				update_value(item_id["bar1_series"][i], ([i],[yval]))
+			for i, yval in enumerate(frame.band_power[1].tolist()):
+				update_value(item_id["bar2_series"][i], ([i],[yval]))
 
 	def callback_timeseries_settings(self):
 		pass
@@ -13,7 +13,6 @@ class Labyrinth():
 		self.Angle_Right_2 = 60
 		
 		self.usb_port = usb_port        
-		print("in __init__")
 		self.board = pyfirmata.Arduino(self.usb_port)
 
 		self.board.servo_config(5)
@@ -24,14 +23,52 @@ class Labyrinth():
 		self.servo2 = self.board.get_pin('d:6:s')
 		self.servo2.write(self.Angle_Left_2)
 		print('Done initializing arduinos')
+
+	def get_target(self, servomotor, direction):
+		#Returns the end angle of a sweep in the direction "left" or "right" for servo 1 or 2.
+		if servomotor == 1:
+			return self.Angle_Left_1 if direction == "left" else self.Angle_Right_1
+		return self.Angle_Left_2 if direction == "left" else self.Angle_Right_2
+
+	def read_angle(self, servomotor):
+		#Returns the current angle of servo 1 or 2.
+		servo = self.servo1 if servomotor == 1 else self.servo2
+		return int(servo.read())
+
+	def write_angles(self, angles):
+		#Writes the angles of several servos, given as {servomotor: angle}, in a single serial write
+		#such that both axes move simultaneously.
+		batch = bytearray()
+		for servomotor, angle in angles.items():
+			servo = self.servo1 if servomotor == 1 else self.servo2
+			angle = int(angle)
+			servo.value = angle
+			batch += bytearray([pyfirmata.ANALOG_MESSAGE + servo.pin_number, angle % 128, angle >> 7])
+		if batch:
+			self.board.sp.write(batch)
+
+	def pass_time(self, t):
+		#Waits t seconds while keeping the Firmata connection alive.
+		self.board.pass_time(t)
 	def __del__(self):
 		#Returns the servos to start position when object is removed or script terminated
+		if getattr(self, 'board', None) is None:
+			return # Not connected, or already closed.
 		print("Shutting down program, returning to start position")
 		self.turn_left(1)
 		self.turn_left(2)
 		print("Shutting down program")
 
-		self.board.exit()
+		self.close()
+
+	def close(self):
+		#Closes the connection to the Arduino, without moving the servos.
+		if getattr(self, 'board', None) is not None:
+			try:
+				self.board.exit()
+			except Exception:
+				pass
+			self.board = None
 #Function that turns the servos to the right postion.
 #Takes the inputs 1 or 2 depending on which servo is wanted 
 
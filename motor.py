@@ -0,0 +1,273 @@
+import time
+import queue
+import logging
+import multiprocessing
+
+from labyrinth import Labyrinth
+from trajectory import PROFILES
+
+# Motion parameters of the servo sweeps, trading speed for smoothness.
+MOTION_PROFILE = "s-curve" # Valid options: "trapezoid", "s-curve".
+MAX_SPEED = 60 # Degrees per second
+MAX_ACCEL = 300 # Degrees per second^2
+CONTROL_RATE = 50 # Servo writes per second
+
+# Connection states of the motor service.
+MOTOR_STATES = ["stopped", "connecting", "connected", "disconnected"]
+STOPPED, CONNECTING, CONNECTED, DISCONNECTED = range(len(MOTOR_STATES))
+
+# Servo (axis) and sweep direction of each game action.
+ACTION_AXES = {
+	"LEFT": (1, "left"),
+	"RIGHT": (1, "right"),
+	"FORWARD": (2, "left"),
+	"BACKWARD": (2, "right"),
+}
+
+def make_command(action: str):
+	"""Motor command of an action, stamped with the time it was issued."""
+	return (action, time.time())
+
+class MotorScheduler:
+	"""
+	Non-blocking command pipeline for the labyrinth servos.
+
+	Queued commands are coalesced per axis, the latest target wins. The
+	queue is polled between the steps of the motion, such that a sweep in
+	progress is retargeted as soon as a new command for its axis arrives,
+	and both axes move simultaneously. Each sweep follows a trajectory with
+	limited speed and acceleration, sampled at a fixed control rate.
+	Reports the queue depth and the latency from a command being issued to
+	the start of the corresponding motion.
+	"""
+	def __init__(self, lab: Labyrinth, command_queue, profile: str=MOTION_PROFILE, max_speed: float=MAX_SPEED,
+	             max_accel: float=MAX_ACCEL, control_rate: float=CONTROL_RATE, report_every: int=50):
+		self.lab = lab
+		self.queue = command_queue
+		self.trajectory = PROFILES[profile]
+		self.max_speed = max_speed
+		self.max_accel = max_accel
+		self.period = 1/control_rate
+		self.report_every = report_every
+		self.pending = {} # Axis -> (target angle, command time), in order of arrival.
+		self.running = True
+		# Statistics.
+		self.commands = 0
+		self.coalesced = 0
+		self.retargeted = 0
+		self.max_depth = 0
+		self.motions = 0
+		self.latency_sum = 0.0
+		self.max_latency = 0.0
+
+	def poll(self, timeout: float=None) -> int:
+		"""
+		Drain all queued commands into the pending targets, waiting at most
+		`timeout` seconds for the first one (None: do not wait). Returns the
+		no. of drained commands, i.e. the queue depth.
+		"""
+		depth = 0
+		try:
+			command = self.queue.get(timeout=timeout) if timeout is not None else self.queue.get_nowait()
+			while True:
+				depth += 1
+				self.__handle(command)
+				command = self.queue.get_nowait()
+		except queue.Empty:
+			pass
+		self.max_depth = max(self.max_depth, depth)
+		return depth
+
+	def __handle(self, command) -> None:
+		"""Handle a single command, given as an action or an (action, time) pair."""
+		action, t = command if isinstance(command, tuple) else (command, time.time())
+		if action == "end": # To be called at program exit.
+			self.running = False
+		elif action == "reset": # To be called at braingame.stop_game
+			# TODO: Return to starting configuration.
+			pass
+		elif action in ACTION_AXES:
+			axis, direction = ACTION_AXES[action]
+			if axis in self.pending:
+				self.coalesced += 1
+				del self.pending[axis] # Re-insert as the latest command.
+			self.pending[axis] = (self.lab.get_target(axis, direction), t)
+			self.commands += 1
+
+	def run(self) -> None:
+		"""
+		Process commands until the "end" command is received. All moving axes
+		follow their trajectories on a single timing loop, with one batched
+		write for all axes per control period.
+		"""
+		angles = {axis: self.lab.read_angle(axis) for axis, _ in ACTION_AXES.values()} # Last written angles.
+		motions = {} # Axis -> (trajectory, start time), for all moving axes.
+		next_tick = time.perf_counter()
+		while self.running:
+			# Wait for commands while idle, otherwise only check for new ones.
+			self.poll(timeout=0.1 if not motions and not self.pending else None)
+			now = time.perf_counter()
+			# Plan the motion of the axes with new commands, retargeting moving axes
+			# from their current position, velocity and acceleration.
+			for axis, (target, t) in self.pending.items():
+				if axis in motions:
+					trajectory, t0 = motions[axis]
+					position, velocity, accel = trajectory.sample(now - t0)
+					self.retargeted += 1
+				else:
+					position, velocity, accel = angles[axis], 0.0, 0.0
+				motions[axis] = (self.trajectory(position, target, self.max_speed, self.max_accel, velocity, accel), now)
+				self.__record_latency(t)
+			self.pending.clear()
+			if not motions:
+				continue
+			# Sample all trajectories, writing only changed angles.
+			step = {}
+			for axis, (trajectory, t0) in list(motions.items()):
+				position, _, _ = trajectory.sample(now - t0)
+				angle = int(round(position))
+				if angle != angles[axis]:
+					angles[axis] = angle
+					step[axis] = angle
+				if now - t0 >= trajectory.duration:
+					del motions[axis]
+			if step:
+				self.lab.write_angles(step)
+			# Keep a fixed control rate, independent of the processing time.
+			now = time.perf_counter()
+			next_tick = max(next_tick + self.period, now)
+			self.lab.pass_time(next_tick - now)
+
+	def __record_latency(self, t: float) -> None:
+		latency = time.time() - t
+		self.motions += 1
+		self.latency_sum += latency
+		self.max_latency = max(self.max_latency, latency)
+		if self.motions % self.report_every == 0:
+			logging.info(f"Motor scheduler: {self.get_stats()}")
+
+	def get_stats(self):
+		"""Command counters, max. queue depth and command-to-motion latency (in ms)."""
+		return {
+			'commands': self.commands,
+			'coalesced': self.coalesced,
+			'retargeted': self.retargeted,
+			'max_queue_depth': self.max_depth,
+			'pending': len(self.pending),
+			'mean_latency_ms': 1e3*self.latency_sum/max(self.motions, 1),
+			'max_latency_ms': 1e3*self.max_latency,
+		}
+
+def discard_commands(command_queue, duration: float) -> bool:
+	"""Discard commands for the given duration. Returns False if the "end" command was received."""
+	deadline = time.perf_counter() + duration
+	while (remaining := deadline - time.perf_counter()) > 0:
+		try:
+			command = command_queue.get(timeout=remaining)
+		except queue.Empty:
+			break
+		action = command[0] if isinstance(command, tuple) else command
+		if action == "end":
+			return False
+	return True
+
+def motor_service(command_queue, state, usb_port: str, reconnect_interval: float=2.0, 
+                  max_reconnect_interval: float=60.0) -> None:
+	"""
+	Main function of the motor process. Owns the Arduino link for the lifetime
+	of the process, and reconnects in the background if the link is lost, 
+	doubling the retry interval up to `max_reconnect_interval`.
+	Commands issued while disconnected are discarded.
+	"""
+	logging.basicConfig(level=logging.INFO)
+	running = True
+	failures = 0 # Failed connection attempts since the last connection.
+	while running:
+		state.value = CONNECTING
+		try:
+			lab = Labyrinth(usb_port)
+		except Exception:
+			# Full report once per disconnect episode, the retries are logged at debug level.
+			if failures == 0:
+				logging.warning(f"Motor service: Could not connect to {usb_port}, retrying in the background", exc_info=True)
+			else:
+				logging.debug(f"Motor service: Could not connect to {usb_port}, attempt {failures + 1}")
+			state.value = DISCONNECTED
+			interval = min(reconnect_interval*2**failures, max_reconnect_interval)
+			failures += 1
+			running = discard_commands(command_queue, interval)
+			continue
+		failures = 0
+		state.value = CONNECTED
+		logging.info(f"Motor service: Connected to {usb_port}")
+		scheduler = MotorScheduler(lab, command_queue)
+		try:
+			scheduler.run()
+			running = False
+		except Exception:
+			logging.warning("Motor service: Connection lost", exc_info=True)
+			state.value = DISCONNECTED
+		logging.info(f"Motor service: Command statistics: {scheduler.get_stats()}")
+		if running:
+			lab.close()
+		else:
+			# Safely shut down program.
+			lab.__del__()
+	state.value = STOPPED
+
+class MotorService:
+	"""
+	Long-lived motor process, owning the Arduino link across game sessions
+	and settings changes. The connection state is shared with the GUI.
+	"""
+	def __init__(self, usb_port: str="COM3"):
+		self.usb_port = usb_port # TODO: FIX THIS HARDCODING, MAKE IT SELECTABLE FROM THE GUI
+		self.queue = None
+		self.process = None
+		self.state = multiprocessing.Value('i', STOPPED)
+
+	def is_alive(self) -> bool:
+		return self.process is not None and self.process.is_alive()
+
+	def start(self) -> None:
+		"""Start the motor process, unless it is already running."""
+		if self.is_alive():
+			return
+		self.queue = multiprocessing.Queue()
+		self.state.value = CONNECTING
+		self.process = multiprocessing.Process(target=motor_service, args=(self.queue, self.state, self.usb_port), daemon=True)
+		self.process.start()
+
+	def send(self, action: str) -> None:
+		"""Send a game action to the motors."""
+		if self.queue is not None:
+			self.queue.put(make_command(action))
+
+	def get_state(self) -> str:
+		"""Connection state: "stopped", "connecting", "connected" or "disconnected"."""
+		if self.process is not None and not self.process.is_alive():
+			return MOTOR_STATES[STOPPED]
+		return MOTOR_STATES[self.state.value]
+
+	def wait_connected(self, timeout: float=10.0, poll_interval: float=0.05) -> str:
+		"""
+		Wait while the service is connecting, at most `timeout` seconds. Returns the
+		connection state. The Firmata handshake alone takes 5 s on a healthy link.
+		"""
+		deadline = time.perf_counter() + timeout
+		while self.get_state() == MOTOR_STATES[CONNECTING] and time.perf_counter() < deadline:
+			time.sleep(poll_interval)
+		return self.get_state()
+
+	def stop(self, timeout: float=5.0) -> None:
+		"""Stop the motor process, returning the servos to their start position."""
+		if self.queue is None:
+			return
+		self.queue.put("end")
+		self.queue.close()
+		self.process.join(timeout)
+		if self.process.is_alive():
+			self.process.terminate()
+		self.queue = None
+		self.process = None
+		self.state.value = STOPPED
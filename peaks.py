@@ -0,0 +1,101 @@
+import numpy as np
+
+class PeakDetector:
+	"""
+	Online peak detector with hysteresis, processing only new samples.
+
+	An excursion starts when the signal rises to `height` and ends when it
+	falls below `height - hysteresis`. When an excursion of at least
+	`min_width` samples ends, the time of its maximum is reported as a peak.
+	"""
+	def __init__(self, height: float=0.9, hysteresis: float=0.05, min_width: int=150):
+		self.height = height
+		self.lower = height - hysteresis
+		self.min_width = min_width
+		self.last_time = -np.inf # Timestamp of the last processed sample.
+		self.above = False
+		self.width = 0
+		self.peak_value = -np.inf
+		self.peak_time = None
+
+	def update(self, times: np.ndarray, values: np.ndarray) -> list:
+		"""
+		Process the samples of the (time-sorted) history newer than the last
+		processed sample. Returns the times of the detected peaks.
+		"""
+		peaks = []
+		start = np.searchsorted(times, self.last_time, side='right')
+		for t, value in zip(times[start:].tolist(), values[start:].tolist()):
+			if not self.above:
+				if value >= self.height:
+					# Start of a new excursion.
+					self.above = True
+					self.width = 1
+					self.peak_value, self.peak_time = value, t
+			elif value >= self.lower:
+				self.width += 1
+				if value > self.peak_value:
+					self.peak_value, self.peak_time = value, t
+			else:
+				# End of the excursion.
+				self.above = False
+				if self.width >= self.min_width:
+					peaks.append(self.peak_time)
+		if len(times) > start:
+			self.last_time = times[-1]
+		return peaks
+
+class PeakIndex:
+	"""
+	Time-windowed, sorted index of recent peak times. Peaks older than 
+	`window` seconds relative to the newest sample are expired, and the 
+	nearest-peak lookup is a binary search. Storage is bounded by `capacity`.
+	"""
+	def __init__(self, window: float, capacity: int=64):
+		self.window = window
+		self.capacity = capacity
+		self.times = np.zeros(capacity)
+		self.start = 0
+		self.end = 0
+		self.evicted = 0 # No. of peaks removed by expiry or overflow.
+
+	def __len__(self):
+		return self.end - self.start
+
+	def expire(self, now: float) -> int:
+		"""Remove peaks older than the window. Returns the no. of removed peaks."""
+		cutoff = np.searchsorted(self.times[self.start:self.end], now - self.window, side='left')
+		self.start += cutoff
+		self.evicted += cutoff
+		return cutoff
+
+	def insert(self, t: float) -> None:
+		"""Insert a peak time, keeping the index sorted."""
+		if self.end == self.capacity:
+			if self.start == 0:
+				# Full: evict the oldest peak.
+				self.start = 1
+				self.evicted += 1
+			# Compact the live entries to the front of the array.
+			n = len(self)
+			self.times[:n] = self.times[self.start:self.end]
+			self.start, self.end = 0, n
+		i = self.start + np.searchsorted(self.times[self.start:self.end], t)
+		self.times[i+1:self.end+1] = self.times[i:self.end]
+		self.times[i] = t
+		self.end += 1
+
+	def nearest_distance(self, t: float) -> float:
+		"""Distance in time to the nearest indexed peak, inf if the index is empty."""
+		live = self.times[self.start:self.end]
+		i = np.searchsorted(live, t)
+		distance = np.inf
+		if i > 0:
+			distance = t - live[i-1]
+		if i < live.size:
+			distance = min(distance, live[i] - t)
+		return distance
+
+	def get_stats(self):
+		"""Size and eviction counters."""
+		return {'size': len(self), 'evicted': self.evicted}
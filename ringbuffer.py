@@ -0,0 +1,95 @@
+import numpy as np
+
+class RingBuffer:
+	"""
+	Preallocated multi-row ring buffer holding the latest `capacity` samples.
+
+	The buffer is stored twice side by side ("mirrored"), such that the
+	latest window of samples is always available as a contiguous, zero-copy
+	view. Appending only writes the new samples and never reallocates.
+	"""
+	def __init__(self, num_rows: int, capacity: int, init_data: np.ndarray=None, dtype=np.float64):
+		self.num_rows = num_rows
+		self.capacity = capacity
+		self.buffer = np.zeros((num_rows, 2*capacity), dtype=dtype)
+		self.pos = 0 # Index of the oldest sample, i.e. the next write position.
+		self.num_samples = 0 # Total no. of samples appended since creation.
+		if init_data is not None:
+			# Prefill with initial/old data, aligned to the end of the window.
+			self.buffer[:, :capacity] = init_data[:, -capacity:]
+			self.buffer[:, capacity:] = self.buffer[:, :capacity]
+
+	def append(self, data: np.ndarray) -> int:
+		"""Append new samples (columns) to the buffer. Returns the no. of new samples."""
+		num_new = data.shape[1]
+		if num_new == 0:
+			return 0
+		# Only the latest `capacity` samples can be retained.
+		if num_new > self.capacity:
+			data = data[:, -self.capacity:]
+		n = data.shape[1]
+		# Write up to the end of the first half, then wrap around. Every
+		# sample is written to both halves of the mirrored buffer.
+		first = min(n, self.capacity - self.pos)
+		rest = n - first
+		start = self.pos
+		self.buffer[:, start:start+first] = data[:, :first]
+		self.buffer[:, start+self.capacity:start+self.capacity+first] = data[:, :first]
+		if rest > 0:
+			self.buffer[:, :rest] = data[:, first:]
+			self.buffer[:, self.capacity:self.capacity+rest] = data[:, first:]
+		self.pos = (self.pos + n) % self.capacity
+		self.num_samples += num_new
+		return num_new
+
+	def push(self, value) -> None:
+		"""Append a single sample (one value per row)."""
+		self.buffer[:, self.pos] = value
+		self.buffer[:, self.pos+self.capacity] = value
+		self.pos = (self.pos + 1) % self.capacity
+		self.num_samples += 1
+
+	def view(self) -> np.ndarray:
+		"""Zero-copy view of the latest window, ordered from oldest to newest sample."""
+		return self.buffer[:, self.pos:self.pos+self.capacity]
+
+	def latest(self, num: int) -> np.ndarray:
+		"""Zero-copy view of the latest `num` samples."""
+		return self.buffer[:, self.pos+self.capacity-num:self.pos+self.capacity]
+
+class MetricHistory:
+	"""
+	Compact circular history of a metric, with float64 timestamps and float32
+	metric values. Returns ordered zero-copy views of the filled part.
+	"""
+	def __init__(self, capacity: int, init_time: np.ndarray=None, init_metric: np.ndarray=None):
+		self.capacity = capacity
+		self.time = RingBuffer(1, capacity, dtype=np.float64)
+		self.metric = RingBuffer(1, capacity, dtype=np.float32)
+		self.rel_time = np.zeros(capacity) # Preallocated output for the relative time.
+		self.count = 0
+		if init_time is not None:
+			n = min(len(init_time), capacity)
+			self.time.append(np.asarray(init_time, dtype=np.float64)[np.newaxis, -n:])
+			self.metric.append(np.asarray(init_metric, dtype=np.float32)[np.newaxis, -n:])
+			self.count = n
+
+	def append(self, t: float, metric: float) -> None:
+		"""Append a single (timestamp, metric) pair."""
+		self.time.push(t)
+		self.metric.push(metric)
+		self.count = min(self.count + 1, self.capacity)
+
+	def get_time(self) -> np.ndarray:
+		"""Ordered view of the absolute timestamps."""
+		return self.time.latest(self.count)[0]
+
+	def get_metric(self) -> np.ndarray:
+		"""Ordered view of the metric values."""
+		return self.metric.latest(self.count)[0]
+
+	def get_relative_time(self, t: float) -> np.ndarray:
+		"""Timestamps relative to `t`, computed into a preallocated array."""
+		rel_time = self.rel_time[self.capacity-self.count:]
+		np.subtract(self.get_time(), t, out=rel_time)
+		return rel_time
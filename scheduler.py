@@ -0,0 +1,96 @@
+import time
+import logging
+import numpy as np
+from brainflow.board_shim import BoardShim
+
+def tick_period(sampling_rate: int, hop_samples: int=None, hop_time: float=None) -> float:
+	"""Nominal tick period in seconds, the shorter of the two hops."""
+	if hop_samples is None and hop_time is None:
+		raise ValueError("TickScheduler: hop_samples or hop_time must be set")
+	periods = [hop_time] if hop_time is not None else []
+	if hop_samples is not None:
+		periods.append(hop_samples/sampling_rate)
+	return min(periods)
+
+class TickScheduler:
+	"""
+	Fixed-rate scheduler for the game logic, driven by sample arrival.
+
+	A tick is due when `hop_samples` new samples have arrived in the board
+	buffer, or when `hop_time` seconds have passed since the last tick.
+	Either criterion can be disabled by setting it to None. Reports tick
+	jitter (deviation of the tick interval from the nominal hop) and
+	overruns (ticks whose processing took longer than the nominal hop).
+	"""
+	def __init__(self, board_shim: BoardShim, sampling_rate: int, hop_samples: int=None, hop_time: float=None,
+	             poll_interval: float=0.002, max_wait: float=1.0, report_every: int=1000):
+		self.period = tick_period(sampling_rate, hop_samples, hop_time) # Nominal, in seconds.
+		self.board_shim = board_shim
+		self.hop_samples = hop_samples
+		self.hop_time = hop_time
+		self.poll_interval = poll_interval
+		self.max_wait = max_wait
+		self.report_every = report_every
+		self.reset()
+
+	def reset(self):
+		"""Reset the timing and all statistics."""
+		self.last_tick = None
+		self.tick_start = None
+		self.ticks = 0
+		self.overruns = 0
+		# Running sums of the interval deviation from the nominal period.
+		self.dev_sum = 0.0
+		self.dev_sq_sum = 0.0
+		self.max_processing = 0.0
+
+	def wait(self, is_running=lambda: True) -> bool:
+		"""
+		Block until the next tick is due. Returns False if `is_running` turned
+		false while waiting, i.e. the tick should be skipped.
+		"""
+		start = time.perf_counter()
+		while is_running():
+			now = time.perf_counter()
+			if self.hop_samples is not None and self.board_shim.get_board_data_count() >= self.hop_samples:
+				break
+			if self.hop_time is not None and (self.last_tick is None or now - self.last_tick >= self.hop_time):
+				break
+			if now - start >= self.max_wait:
+				break # No data arriving, tick anyway to keep the game responsive.
+			time.sleep(self.poll_interval)
+		else:
+			return False
+		# Record the tick interval.
+		now = time.perf_counter()
+		if self.last_tick is not None:
+			deviation = (now - self.last_tick) - self.period
+			self.dev_sum += deviation
+			self.dev_sq_sum += deviation**2
+		self.last_tick = now
+		self.tick_start = now
+		return True
+
+	def done(self) -> None:
+		"""Mark the end of the processing of the current tick."""
+		processing = time.perf_counter() - self.tick_start
+		self.max_processing = max(self.max_processing, processing)
+		if processing > self.period:
+			self.overruns += 1
+		self.ticks += 1
+		if self.ticks % self.report_every == 0:
+			logging.debug(f"Tick scheduler: {self.get_stats()}")
+
+	def get_stats(self):
+		"""Tick count, jitter (std of the interval deviation, in ms) and overruns."""
+		n = max(self.ticks - 1, 1)
+		mean = self.dev_sum / n
+		jitter = np.sqrt(max(self.dev_sq_sum/n - mean**2, 0.0))
+		return {
+			'ticks': self.ticks,
+			'period_ms': 1e3*self.period,
+			'mean_deviation_ms': 1e3*mean,
+			'jitter_ms': 1e3*jitter,
+			'max_processing_ms': 1e3*self.max_processing,
+			'overruns': self.overruns,
+		}
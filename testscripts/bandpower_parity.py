@@ -0,0 +1,67 @@
+"""
+Parity check of the incremental band power estimate (WelchBandPower) against
+BrainFlow's DataFilter.get_avg_band_powers, which computed the features the
+BrainFlow metric classifiers expect. Records the synthetic board, filters the
+data in ticks as the game does, and compares the relative band powers of the
+sliding window for:
+  estimate  whole-window Welch aligned to the window start, vs. get_avg_band_powers without filtering (should be exact)
+  update    incremental estimate, vs. get_avg_band_powers without filtering (segment alignment)
+  filtered  incremental estimate, vs. get_avg_band_powers with filtering, as formerly called by the game
+Run from the repository root: python testscripts/bandpower_parity.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+from brainflow.data_filter import DataFilter
+from bandpower import WelchBandPower
+from braingame import FilterData, WINDOW_SIZE
+
+BOARD_ID = BoardIds.SYNTHETIC_BOARD
+CHANNEL = 1
+RECORD_TIME = 15 # Seconds
+HOP = 10 # Samples per tick
+
+def record(board_shim: BoardShim) -> np.ndarray:
+	board_shim.prepare_session()
+	board_shim.start_stream()
+	time.sleep(RECORD_TIME)
+	data = board_shim.get_board_data()
+	board_shim.stop_stream()
+	board_shim.release_session()
+	return data
+
+def main():
+	BoardShim.disable_board_logger()
+	board_shim = BoardShim(BOARD_ID, BrainFlowInputParams())
+	sampling_rate = BoardShim.get_sampling_rate(BOARD_ID)
+	num_points = WINDOW_SIZE * sampling_rate
+	data = record(board_shim)
+	board_shim.prepare_session() # FilterData queries the board description only.
+	filt = FilterData(board_shim, [CHANNEL], streaming=True)
+	board_shim.release_session()
+	estimator = WelchBandPower(sampling_rate, num_points)
+	errors = {'estimate': [], 'update': [], 'filtered': []}
+	for stop in range(HOP, data.shape[1] + 1, HOP):
+		filt.filter_stream(data[:, stop-HOP:stop])
+		if stop < num_points:
+			continue
+		window = np.ascontiguousarray(data[CHANNEL, stop-num_points:stop])
+		rows = np.vstack([window, window])
+		reference = DataFilter.get_avg_band_powers(rows, [0], sampling_rate, False)[0]
+		filtered = DataFilter.get_avg_band_powers(rows.copy(), [0], sampling_rate, True)[0]
+		band_power = estimator.update(window, stop)
+		errors['update'].append(band_power - reference)
+		errors['filtered'].append(band_power - filtered)
+		errors['estimate'].append(estimator.estimate(window) - reference)
+	print(f"{len(errors['update'])} windows of {num_points} samples, hop {HOP}")
+	print("Max. abs. difference per band (delta, theta, alpha, beta, gamma):")
+	for name, diff in errors.items():
+		diff = np.abs(np.array(diff))
+		print(f"  {name:<9} max {np.array2string(diff.max(0), precision=4)}  mean {np.array2string(diff.mean(0), precision=4)}")
+
+if __name__ == '__main__':
+	main()
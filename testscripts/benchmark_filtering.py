@@ -0,0 +1,46 @@
+"""
+Benchmark of the per-channel filtering loop vs. the batched filtering path
+of braingame.FilterData, for an increasing number of active channels.
+Run from the repository root: python testscripts/benchmark_filtering.py
+"""
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+from braingame import FilterData, WINDOW_SIZE
+
+HOP = 10 # New samples per tick in streaming mode.
+REPEATS = 200
+
+def bench(filter_data: FilterData, data: np.ndarray, streaming: bool):
+	"""Return mean time per call in microseconds."""
+	if streaming:
+		chunk = data[:, :HOP].copy()
+		fn = lambda: filter_data.filter_stream(chunk)
+	else:
+		window = data.copy()
+		fn = lambda: filter_data.filter_data(window)
+	fn() # Warm-up, initializes filter state.
+	return 1e6*timeit.timeit(fn, number=REPEATS)/REPEATS
+
+def main():
+	board_shim = BoardShim(BoardIds.SYNTHETIC_BOARD, BrainFlowInputParams())
+	sampling_rate = BoardShim.get_sampling_rate(BoardIds.SYNTHETIC_BOARD)
+	num_points = WINDOW_SIZE*sampling_rate
+	rng = np.random.default_rng(0)
+
+	print(f"{'mode':>10} {'channels':>8} {'loop (us)':>10} {'batched (us)':>12} {'speedup':>8}")
+	for streaming in (True, False):
+		for num_channels in (2, 4, 8, 16):
+			channels = list(range(1, num_channels+1))
+			data = 50*rng.standard_normal((num_channels+1, num_points))
+			t_loop = bench(FilterData(board_shim, channels, streaming=streaming, batched=False), data, streaming)
+			t_batched = bench(FilterData(board_shim, channels, streaming=streaming, batched=True), data, streaming)
+			mode = 'streaming' if streaming else 'window'
+			print(f"{mode:>10} {num_channels:>8} {t_loop:>10.1f} {t_batched:>12.1f} {t_loop/t_batched:>8.2f}")
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,101 @@
+"""
+Micro-benchmark of the per-frame cost of preparing the plot data, comparing
+the former path (deep copy of the quantities, conversion to Python lists) with
+the preallocated PlotFrame path (in-place copy, NumPy views passed to Dear PyGui),
+with and without decimation to the plot width, at widths where it is skipped
+and where it applies.
+Reports time and allocations per frame. Dear PyGui is not needed, the values
+passed to dpg.set_value are built but not submitted.
+Run from the repository root: python testscripts/benchmark_plot_frames.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datacontainer import DataContainer, PlotFrame
+from gameworker import copy_quantities
+
+SAMPLING_RATE = 250
+WINDOW_SIZE = 5 # Seconds
+FRAMES = 500
+PLOT_WIDTHS = (400, 200) # Pixels, decimation applies from 4 samples per pixel column
+
+def make_quantities(num_points: int):
+	"""Quantities of a game tick, shaped as returned by GameLogic.update."""
+	rng = np.random.default_rng(0)
+	time_axis = -np.arange(num_points)[::-1]/SAMPLING_RATE
+	quantities = []
+	for _ in range(2):
+		metric_time = time.time() + time_axis
+		quantities.append({
+			'time_series': (time_axis, 50*rng.standard_normal(num_points)),
+			'band_power': rng.random(5),
+			'focus_metric': (metric_time, metric_time - metric_time[-1], rng.random(num_points).astype(np.float32)),
+		})
+	return tuple(quantities)
+
+def old_path(quantities):
+	"""Snapshot by deep copy, plot values as lists."""
+	snapshot = copy_quantities(quantities)
+	values = []
+	for player_info in snapshot:
+		time1, timeseries1 = player_info['time_series']
+		_, rel_time1, metric1 = player_info['focus_metric']
+		values.append([list(time1), list(timeseries1)])
+		values.append([list(rel_time1), list(metric1)])
+		values.extend(([i], [y]) for i, y in enumerate(player_info['band_power']))
+	return values
+
+def new_path(frames: DataContainer, quantities):
+	"""Snapshot into a preallocated frame, plot values as NumPy views."""
+	frame = frames.acquire()
+	frame.fill(quantities)
+	frames.put(frame)
+	frame = frames.get()
+	values = []
+	for p in range(2):
+		values.append(frame.get_time_series(p))
+		values.append(frame.get_focus_metric(p))
+		values.extend(([i], [y]) for i, y in enumerate(frame.band_power[p].tolist()))
+	return values
+
+def bench(fn):
+	"""Return time (us), allocated memory blocks and peak traced bytes per frame."""
+	fn() # Warm-up.
+	start = time.perf_counter()
+	for _ in range(FRAMES):
+		fn()
+	elapsed = 1e6*(time.perf_counter() - start)/FRAMES
+
+	# Count allocations of a single frame, keeping its result alive.
+	blocks = sys.getallocatedblocks()
+	result = fn()
+	blocks = sys.getallocatedblocks() - blocks
+	del result
+
+	tracemalloc.start()
+	fn()
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return elapsed, blocks, peak
+
+def main():
+	quantities = make_quantities(WINDOW_SIZE*SAMPLING_RATE)
+	paths = [('old', lambda: old_path(quantities))]
+	for method in (None, 'minmax', 'lttb'):
+		for width in PLOT_WIDTHS if method is not None else PLOT_WIDTHS[:1]:
+			frames = DataContainer(slots=[PlotFrame(method=method) for _ in range(3)])
+			frames.set_width(width)
+			paths.append((f"new ({method}, {width}px)", lambda frames=frames: new_path(frames, quantities)))
+
+	print(f"{'path':>24} {'time (us)':>10} {'blocks':>8} {'peak (kB)':>10} {'points':>7}")
+	for name, fn in paths:
+		elapsed, blocks, peak = bench(fn)
+		points = len(fn()[0][0])
+		print(f"{name:>24} {elapsed:>10.1f} {blocks:>8} {peak/1024:>10.1f} {points:>7}")
+
+if __name__ == '__main__':
+	main()
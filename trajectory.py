@@ -0,0 +1,147 @@
+import abc
+import math
+import numpy as np
+
+class Trajectory(abc.ABC):
+	"""
+	Time-parameterized one-dimensional motion towards a target, starting at
+	t = 0 from a given position and velocity. `sample(t)` returns the
+	position, velocity and acceleration at time t, and holds the target
+	after `duration`.
+	"""
+	def __init__(self, start: float, target: float):
+		self.start = start
+		self.target = target
+		self.duration = 0.0
+
+	@abc.abstractmethod
+	def sample(self, t: float):
+		"""Position, velocity and acceleration at time t."""
+
+class TrapezoidTrajectory(Trajectory):
+	"""
+	Trapezoidal velocity profile: constant acceleration up to the maximum
+	speed, cruise, constant deceleration. Starts from any initial velocity,
+	first braking if moving away from or overshooting the target.
+	"""
+	def __init__(self, start: float, target: float, max_speed: float, max_accel: float, v0: float=0.0, a0: float=0.0):
+		super().__init__(start, target)
+		self.v0 = v0
+		# Piecewise constant acceleration, as (duration, acceleration).
+		self.segments = []
+		self.__plan(target - start, v0, max_speed, max_accel)
+		self.duration = sum(duration for duration, _ in self.segments)
+
+	def __plan(self, distance: float, v0: float, vmax: float, amax: float):
+		s = 1.0 if distance >= 0 else -1.0 # Direction of the motion.
+		d, v = s*distance, s*v0 # Distance and velocity along the direction.
+		if v < 0 or v*v/(2*amax) > d:
+			# Moving away from the target or unable to stop in time: brake to rest first.
+			t = abs(v)/amax
+			self.segments.append((t, -math.copysign(amax, v)*s))
+			self.__plan(distance - s*v*abs(v)/(2*amax), 0.0, vmax, amax)
+			return
+		# Peak velocity of a triangular profile, limited by the maximum speed.
+		vp = min(math.sqrt(amax*d + v*v/2), max(vmax, v))
+		t_acc = (vp - v)/amax
+		t_dec = vp/amax
+		d_cruise = d - (vp*vp - v*v)/(2*amax) - vp*vp/(2*amax)
+		self.segments.append((t_acc, s*amax))
+		if d_cruise > 0 and vp > 0:
+			self.segments.append((d_cruise/vp, 0.0))
+		self.segments.append((t_dec, -s*amax))
+
+	def sample(self, t: float):
+		position, velocity = self.start, self.v0
+		for duration, accel in self.segments:
+			dt = min(t, duration)
+			if dt > 0:
+				position += velocity*dt + 0.5*accel*dt*dt
+				velocity += accel*dt
+			if t <= duration:
+				return position, velocity, accel
+			t -= duration
+		return self.target, 0.0, 0.0
+
+class SCurveTrajectory(Trajectory):
+	"""
+	S-curve (minimum-jerk) profile: a quintic polynomial from the initial
+	position, velocity and acceleration to rest at the target, with smooth
+	acceleration. The duration is the shortest one, in steps of 10%, for 
+	which the peak speed and acceleration stay within the limits (or within
+	the initial ones, if these exceed the limits). If there is none, e.g.
+	when overshooting the target, it first brakes to rest at the maximum
+	acceleration, as the trapezoid profile does.
+	"""
+	def __init__(self, start: float, target: float, max_speed: float, max_accel: float, v0: float=0.0, a0: float=0.0,
+	             max_iterations: int=20):
+		super().__init__(start, target)
+		# Braking phase, as (duration, acceleration), and initial velocity.
+		self.brake = (0.0, 0.0)
+		self.v0 = v0
+		if self.__search(start, target, max_speed, max_accel, v0, a0, max_iterations):
+			return
+		t = abs(v0)/max_accel
+		self.brake = (t, -math.copysign(max_accel, v0))
+		stop = start + v0*t/2
+		self.__search(stop, target, max_speed, max_accel, 0.0, 0.0, 1)
+		self.duration += t
+
+	def __search(self, start: float, target: float, max_speed: float, max_accel: float, v0: float, a0: float,
+	             max_iterations: int) -> bool:
+		"""Fit the shortest quintic within the limits, return False if there is none within the iterations."""
+		d = abs(target - start)
+		# Peak velocity and acceleration of a rest-to-rest minimum-jerk motion are
+		# 1.875 d/T and 5.77 d/T^2, a lower bound of the duration.
+		T = max(1.875*d/max_speed, math.sqrt(5.7735*d/max_accel), abs(v0)/max_accel)
+		if T == 0:
+			self.duration = 0.0
+			self.coefficients = (target, 0.0, 0.0, 0.0, 0.0, 0.0)
+			return True
+		# Starting from a motion, the peaks can be far higher: stretch the duration until within the limits.
+		speed_limit = max(max_speed, abs(v0))*1.001
+		accel_limit = max(max_accel, abs(a0))*1.001
+		for _ in range(max_iterations):
+			self.__fit(start, target, v0, a0, T)
+			speed, accel = self.__peaks()
+			if speed <= speed_limit and accel <= accel_limit:
+				return True
+			T *= 1.1
+		return False
+
+	def __fit(self, start: float, target: float, v0: float, a0: float, T: float):
+		"""Quintic with p(0) = start, p'(0) = v0, p''(0) = a0 and p(T) = target, p'(T) = p''(T) = 0."""
+		self.duration = T
+		h = target - start
+		c3 = (20*h - (12*v0 + 3*a0*T)*T)/(2*T**3)
+		c4 = (-30*h + (16*v0 + 3*a0*T)*T)/(2*T**4)
+		c5 = (12*h - (6*v0 + a0*T)*T)/(2*T**5)
+		self.coefficients = (start, v0, a0/2, c3, c4, c5)
+
+	def __peaks(self):
+		"""Peak |velocity| and |acceleration| over the motion, at the ends or the stationary points."""
+		_, c1, c2, c3, c4, c5 = self.coefficients
+		# Velocity is stationary at the roots of the acceleration, acceleration at the roots of the jerk.
+		accel = [20*c5, 12*c4, 6*c3, 2*c2]
+		jerk = [60*c5, 24*c4, 6*c3]
+		peaks = []
+		for f, df in ((np.array([5*c5, 4*c4, 3*c3, 2*c2, c1]), accel), (np.array(accel), jerk)):
+			roots = np.roots(df)
+			t = roots.real[(np.abs(roots.imag) < 1e-9) & (roots.real > 0) & (roots.real < self.duration)]
+			peaks.append(np.abs(np.polyval(f, np.append(t, (0.0, self.duration)))).max())
+		return peaks
+
+	def sample(self, t: float):
+		if t >= self.duration:
+			return self.target, 0.0, 0.0
+		t_brake, a_brake = self.brake
+		if t < t_brake:
+			return self.start + self.v0*t + 0.5*a_brake*t*t, self.v0 + a_brake*t, a_brake
+		t -= t_brake
+		c0, c1, c2, c3, c4, c5 = self.coefficients
+		position = c0 + t*(c1 + t*(c2 + t*(c3 + t*(c4 + t*c5))))
+		velocity = c1 + t*(2*c2 + t*(3*c3 + t*(4*c4 + t*5*c5)))
+		accel = 2*c2 + t*(6*c3 + t*(12*c4 + t*20*c5))
+		return position, velocity, accel
+
+PROFILES = {'trapezoid': TrapezoidTrajectory, 's-curve': SCurveTrajectory}
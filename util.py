@@ -2,35 +2,180 @@ import sys
 import glob
 import serial
 import time
+import threading
+import concurrent.futures
 import numpy as np
 
-def serial_ports():
-	""" Lists serial port names
+def candidate_ports():
+	""" Lists the names of all candidate serial ports, without opening them.
 
 		:raises EnvironmentError:
 			On unsupported or unknown platforms
-		:returns:
-			A list of the serial ports available on the system
 	"""
 	if sys.platform.startswith('win'):
-		ports = ['COM%s' % (i + 1) for i in range(256)]
+		# Enumerate the present COM ports instead of probing all 256 names.
+		from serial.tools import list_ports
+		return sorted(port.device for port in list_ports.comports())
 	elif sys.platform.startswith('linux') or sys.platform.startswith('cygwin'):
 		# this excludes your current terminal "/dev/tty"
-		ports = glob.glob('/dev/tty[A-Za-z]*')
+		return sorted(glob.glob('/dev/tty[A-Za-z]*'))
 	elif sys.platform.startswith('darwin'):
-		ports = glob.glob('/dev/tty.*')
+		return sorted(glob.glob('/dev/tty.*'))
 	else:
 		raise EnvironmentError('Unsupported platform')
 
-	result = []
-	for port in ports:
-		try:
-			s = serial.Serial(port)
-			s.close()
-			result.append(port)
-		except (OSError, serial.SerialException):
-			pass
-	return result
+def probe_port(port: str) -> bool:
+	"""True if the serial port can be opened."""
+	try:
+		s = serial.Serial(port)
+		s.close()
+		return True
+	except (OSError, serial.SerialException):
+		return False
+
+class SerialPortScanner:
+	"""
+	Concurrent, cached serial port discovery. The candidate ports are probed
+	in parallel by a thread pool, a port not answering within `probe_timeout`
+	of its probe is skipped. Results are cached until a rescan, which is done
+	on `refresh()` or, by an optional watcher thread, as soon as the set of
+	candidate ports changes (hot-plug). Excluded ports, e.g. those in use by
+	the board and the motors, are listed if present but never opened. While
+	paused, e.g. during a game, no ports are probed.
+	Listeners are called with the new list of ports whenever it changes.
+	"""
+	def __init__(self, probe_timeout: float=1.0, max_workers: int=32, poll_interval: float=1.0):
+		self.probe_timeout = probe_timeout
+		self.poll_interval = poll_interval
+		self.executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="serial-probe")
+		self.lock = threading.Lock()
+		self.ports = []
+		self.candidates = None # Candidate ports of the last completed scan.
+		self.excluded = set()
+		self.paused = threading.Event()
+		self.refreshing = None # Thread of a background scan in progress.
+		self.listeners = []
+		self.stop_event = threading.Event()
+		self.watcher = None
+
+	def scan(self) -> list:
+		"""Probe all candidate ports concurrently, update the cache and return the available ports."""
+		if self.paused.is_set():
+			with self.lock:
+				return list(self.ports)
+		candidates = candidate_ports()
+		with self.lock:
+			excluded = set(self.excluded)
+		ports = [port for port in candidates if port in excluded]
+		started = {} # Port -> start time of its probe, the pool may queue probes.
+		def probe(port: str) -> bool:
+			started[port] = time.perf_counter()
+			return probe_port(port)
+		pending = {self.executor.submit(probe, port): port for port in candidates if port not in excluded}
+		while pending:
+			deadlines = [started[port] + self.probe_timeout for port in pending.values() if port in started]
+			timeout = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else self.probe_timeout
+			done, _ = concurrent.futures.wait(pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+			for future in done:
+				port = pending.pop(future)
+				if not future.cancelled() and future.result():
+					ports.append(port)
+			now = time.perf_counter()
+			for future, port in list(pending.items()):
+				if port in started and now - started[port] >= self.probe_timeout:
+					del pending[future] # Hung probe, skip the port.
+			if not deadlines and not done and not any(port in started for port in pending.values()):
+				# No probe started within the timeout, all workers hang on skipped ports.
+				for future in pending:
+					future.cancel()
+				break
+		ports.sort()
+		with self.lock:
+			changed = ports != self.ports
+			self.ports = ports
+			self.candidates = candidates
+		if changed:
+			for listener in self.listeners:
+				listener(ports)
+		return ports
+
+	def refresh(self) -> None:
+		"""Start a scan in the background, unless one is already in progress or the scanner is paused."""
+		if self.paused.is_set():
+			return
+		with self.lock:
+			if self.refreshing is not None and self.refreshing.is_alive():
+				return
+			self.refreshing = threading.Thread(target=self.scan, daemon=True)
+			self.refreshing.start()
+
+	def get_ports(self, block: bool=False) -> list:
+		"""
+		Cached list of available ports. Before the first scan, an empty list is
+		returned and the ports are scanned in the background, unless `block` is set.
+		"""
+		with self.lock:
+			scanned = self.candidates is not None
+		if not scanned:
+			if block:
+				return self.scan()
+			self.refresh()
+		with self.lock:
+			return list(self.ports)
+
+	def set_excluded(self, ports) -> None:
+		"""Never open these ports, e.g. as they are in use by this program."""
+		with self.lock:
+			self.excluded = {port for port in ports if port}
+
+	def pause(self) -> None:
+		"""Stop probing ports, e.g. while a game is running. A scan in progress completes."""
+		self.paused.set()
+
+	def resume(self) -> None:
+		"""Resume probing, the watcher rescans if the candidate ports changed meanwhile."""
+		self.paused.clear()
+
+	def add_listener(self, listener) -> None:
+		"""Call listener(ports) whenever the list of available ports changes."""
+		self.listeners.append(listener)
+
+	def start_watching(self) -> None:
+		"""Watch for added or removed ports by polling the candidate port names."""
+		if self.watcher is not None:
+			return
+		self.watcher = threading.Thread(target=self.__watch, daemon=True)
+		self.watcher.start()
+
+	def __watch(self) -> None:
+		first = True
+		while not self.stop_event.wait(0 if first else self.poll_interval):
+			first = False
+			try:
+				current = candidate_ports()
+			except EnvironmentError:
+				return
+			with self.lock:
+				changed = current != self.candidates
+			if changed:
+				self.refresh()
+
+	def stop(self) -> None:
+		self.stop_event.set()
+		self.executor.shutdown(wait=False, cancel_futures=True)
+
+port_scanner = SerialPortScanner()
+
+def serial_ports():
+	""" Lists serial port names
+
+		:raises EnvironmentError:
+			On unsupported or unknown platforms
+		:returns:
+			A list of the serial ports available on the system, from
+			the cache of the port scanner once it has scanned.
+	"""
+	return port_scanner.get_ports(block=True)
 
 class FPS:
 	def __init__(self) -> None: